@@ -0,0 +1,105 @@
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+import degrees
+
+
+def generate(directory, people, movies, cast, seed):
+    """
+    Writes a synthetic people/movies/stars dataset to directory.
+
+    Stars are drawn with a skewed popularity so that, like the real data,
+    a few people appear in many movies and most appear in a handful.
+    """
+    rng = random.Random(seed)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            writer.writerow([i, f"Person {i}", 1900 + rng.randrange(110)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([i, f"Movie {i}", 1920 + rng.randrange(100)])
+
+    popularity = []
+    total = 0.0
+    for i in range(people):
+        total += 1 / (i + 1) ** 0.7
+        popularity.append(total)
+
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movies):
+            for person in set(rng.choices(range(people), cum_weights=popularity, k=cast)):
+                writer.writerow([person, movie])
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of sorted values fall.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees searches on a synthetic co-star graph.")
+    parser.add_argument("--people", type=int, default=20000)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--cast", type=int, default=4, help="stars drawn per movie")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--streaming", action="store_true", help="load with the streaming loader")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, args.people, args.movies, args.cast, args.seed)
+
+        stats = degrees.enable_stats()
+        degrees.load_data(directory, snapshot=False, streaming=args.streaming)
+        print(f"{args.people} people, {args.movies} movies, "
+              f"{len(degrees.graph.neighbours)} co-star edges, loaded in {stats.load_time:.3f}s")
+
+        # query people who starred in something, anyone else is answered instantly
+        rng = random.Random(args.seed)
+        graph = degrees.graph
+        person_ids = [graph.person_ids[i] for i in range(len(graph)) if graph.degree(i)]
+        queries = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(args.queries)]
+
+        # the cache would turn every repeated run into a lookup
+        degrees.path_cache.maxsize = 0
+
+        # build the landmarks up front so the guided latencies are search only
+        degrees.get_landmarks()
+
+        modes = [
+            ("bidirectional", {}),
+            ("single-ended", {"bidirectional": False}),
+            ("guided", {"guided": True}),
+        ]
+        for name, options in modes:
+            stats = degrees.enable_stats()
+            latencies = []
+            for source, target in queries:
+                started = time.perf_counter()
+                degrees.shortest_path(source, target, **options)
+                latencies.append((time.perf_counter() - started) * 1000)
+            latencies.sort()
+            print(f"{name}: p50 {percentile(latencies, 0.5):.3f}ms, "
+                  f"p90 {percentile(latencies, 0.9):.3f}ms, "
+                  f"p99 {percentile(latencies, 0.99):.3f}ms, "
+                  f"max {latencies[-1]:.3f}ms, "
+                  f"{stats.expanded / len(queries):.0f} nodes expanded per query, "
+                  f"max frontier {stats.max_frontier}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+
+from graph import tree_path
+
+# Returned by PathCache.get on a miss, since None is a cached "not connected"
+MISS = object()
+
+
+def reverse_path(source, path):
+    """
+    Reverses a list of (movie, person) pairs leading away from source,
+    giving the pairs that lead from the far end back to source.
+    """
+    stars = [source] + [person for _, person in path]
+    return [(path[i][0], stars[i]) for i in reversed(range(len(path)))]
+
+
+class PathCache():
+    """
+    Bounded LRU cache of shortest paths between interned people.
+
+    Paths are keyed on the unordered pair, so asking for (b, a) after (a, b)
+    is a hit served by reversing the stored path. Whole BFS trees can be
+    cached too, answering any target they reached from their source (or,
+    reversed, any source they reached towards their root).
+    """
+
+    def __init__(self, maxsize=4096, max_trees=8):
+        self.maxsize = maxsize
+        self.max_trees = max_trees
+        self.paths = OrderedDict()
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.paths)
+
+    def clear(self):
+        self.paths.clear()
+        self.trees.clear()
+
+    def invalidate(self):
+        """
+        Drops everything a newly added co-star edge could make out of date:
+        all BFS trees, "not connected" answers and paths longer than one
+        movie. Direct co-star paths are kept, nothing can beat them.
+        """
+        self.trees.clear()
+        for key in [key for key, (_, path) in self.paths.items() if path is None or len(path) > 1]:
+            del self.paths[key]
+
+    def info(self):
+        """
+        Returns the cache counters, to help pick a size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.paths),
+            "maxsize": self.maxsize,
+            "trees": len(self.trees),
+        }
+
+    def get(self, source, target):
+        """
+        Returns the cached path from source to target (None meaning not
+        connected), or MISS.
+        """
+        key = (source, target) if source <= target else (target, source)
+        if key in self.paths:
+            self.paths.move_to_end(key)
+            self.hits += 1
+            start, path = self.paths[key]
+            if path is None or start == source:
+                return path
+            return reverse_path(start, path)
+
+        # fall back to any BFS tree rooted at either end
+        for root, other in ((source, target), (target, source)):
+            if root in self.trees:
+                tree = self.trees[root]
+                if other not in tree:
+                    continue
+                self.trees.move_to_end(root)
+                self.hits += 1
+                path = tree_path(tree, other)
+                self.put(root, other, path)
+                return path if root == source else reverse_path(root, path)
+
+        self.misses += 1
+        return MISS
+
+    def put(self, source, target, path):
+        """
+        Stores the path from source to target, evicting the least
+        recently used pair once the cache is full.
+        """
+        key = (source, target) if source <= target else (target, source)
+        self.paths[key] = (source, path)
+        self.paths.move_to_end(key)
+        while len(self.paths) > self.maxsize:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+
+    def put_tree(self, source, tree):
+        """
+        Stores a BFS tree (person -> (movie, parent)) rooted at source.
+        """
+        self.trees[source] = tree
+        self.trees.move_to_end(source)
+        while len(self.trees) > self.max_trees:
+            self.trees.popitem(last=False)
+            self.evictions += 1
+
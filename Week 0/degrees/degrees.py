@@ -1,30 +1,119 @@
+import argparse
 import csv
+import heapq
+import json
+import math
+import os
 import sys
+import time
+from array import array
 
-from util import Node, StackFrontier, QueueFrontier
+from cache import MISS, PathCache
+from graph import CoStarGraph
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from parallel import imap_groups
+from snapshot import SOURCES, load_snapshot, save_snapshot
+from streaming import stream_data
+from util import Node, IndexedQueueFrontier, SearchStats
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth (who starred in what is kept in graph)
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
 movies = {}
 
+# Compact co-star adjacency over interned ids, built once the data is loaded
+graph = None
 
-def load_data(directory):
+# Recently answered paths and BFS trees, keyed on interned ids
+path_cache = PathCache()
+
+# Prefix and trigram index over names, built on first use or kept in the snapshot
+name_index = None
+
+# Search counters and timers, only collected once set to a SearchStats
+stats = None
+
+# BFS distances from a few landmark people, built on first use
+landmark_index = None
+
+# Maps each CSV filename to how many of its bytes are loaded, rows past that are new
+loaded_sizes = {}
+
+
+def load_data(directory, snapshot=True, streaming=False, memory_budget=None):
     """
     Load data from CSV files into memory.
+
+    With snapshot set, an up-to-date binary snapshot next to the CSVs is
+    memory-mapped instead of parsing them, and a fresh one is written after
+    parsing whenever the CSVs have changed.
+
+    With streaming set, only interned ids, names and the co-star adjacency are
+    kept in memory (within memory_budget bytes, if given), and people and
+    movies read their display fields from the CSVs when looked up. No
+    snapshot is restored or written then.
+    """
+    started = time.perf_counter()
+    read_data(directory, snapshot, streaming, memory_budget)
+    if stats is not None:
+        stats.load_time += time.perf_counter() - started
+
+
+def read_data(directory, snapshot, streaming, memory_budget):
     """
+    Fills names, people, movies and graph for load_data.
+    """
+    global graph, people, movies, name_index, landmark_index
+
+    # start from empty tables, cached paths and indexes refer to the previous data
+    names.clear()
+    people, movies = {}, {}
+    path_cache.clear()
+    name_index = None
+    landmark_index = None
+
+    # the snapshot keeps every display field in memory, streaming leaves them on disk
+    if snapshot and not streaming and restore_snapshot(directory):
+        # catch up on rows appended since the snapshot, and keep it current
+        if refresh_data(directory) and all(
+            loaded_sizes[filename] == os.path.getsize(os.path.join(directory, filename))
+            for filename in SOURCES
+        ):
+            graph = graph.compacted()
+            name_index = NameIndex.from_names(names, graph.person_ids, graph.person_index)
+            try:
+                save_snapshot(directory, graph, people, movies, name_index)
+            except OSError:
+                pass
+        return
+
+    # rows appended while parsing get replayed by refresh_data, which ignores repeats
+    for filename in SOURCES:
+        loaded_sizes[filename] = os.path.getsize(os.path.join(directory, filename))
+
+    if streaming:
+        graph, streamed_names, people, movies = stream_data(directory, memory_budget)
+        names.update(streamed_names)
+        return
+
     # Load people
+    person_ids = []
+    person_index = {}
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            if row["id"] not in person_index:
+                person_index[row["id"]] = len(person_ids)
+                person_ids.append(row["id"])
+            # births and years repeat a lot, keep one copy of each
             people[row["id"]] = {
                 "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+                "birth": sys.intern(row["birth"])
             }
             if row["name"].lower() not in names:
                 names[row["name"].lower()] = {row["id"]}
@@ -32,35 +121,209 @@ def load_data(directory):
                 names[row["name"].lower()].add(row["id"])
 
     # Load movies
+    movie_ids = []
+    movie_index = {}
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            if row["id"] not in movie_index:
+                movie_index[row["id"]] = len(movie_ids)
+                movie_ids.append(row["id"])
             movies[row["id"]] = {
                 "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+                "year": sys.intern(row["year"])
             }
 
-    # Load stars
+    # Load stars as interned ints, the casts go straight into the co-star index
+    edge_people = array("i")
+    edge_movies = array("i")
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                person, movie = person_index[row["person_id"]], movie_index[row["movie_id"]]
             except KeyError:
-                pass
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    # Build the co-star index that searches run on
+    graph = CoStarGraph.from_stars(person_ids, movie_ids, edge_people, edge_movies, person_index)
+    graph.movie_index = movie_index
+
+    if snapshot:
+        name_index = NameIndex.from_names(names, graph.person_ids, graph.person_index)
+        try:
+            save_snapshot(directory, graph, people, movies, name_index, loaded_sizes)
+        except OSError:
+            # a read-only data directory only costs us the faster next start
+            pass
+
+
+def restore_snapshot(directory):
+    """
+    Fills names, people, movies and graph from the snapshot for a directory.
+    Returns False if there is no usable snapshot.
+    """
+    global graph, name_index
+
+    sections = load_snapshot(directory)
+    if sections is None:
+        return False
+
+    graph = CoStarGraph(sections["person_ids"], sections["movie_ids"], sections["offsets"],
+                        sections["neighbours"], sections["movies"],
+                        sections["cast_offsets"], sections["cast_people"])
+    loaded_sizes.update(sections["sizes"])
+
+    for person_id, name, birth in zip(sections["person_ids"], sections["person_names"],
+                                      sections["person_births"]):
+        people[person_id] = {"name": name, "birth": birth}
+        names.setdefault(name.lower(), set()).add(person_id)
+
+    for movie_id, title, year in zip(sections["movie_ids"], sections["movie_titles"],
+                                     sections["movie_years"]):
+        movies[movie_id] = {"title": title, "year": year}
+
+    name_index = NameIndex(sections["person_ids"], sections["names"], sections["name_offsets"],
+                           sections["name_people"], sections["trigrams"],
+                           sections["trigram_offsets"], sections["trigram_keys"])
+
+    return True
+
+
+def refresh_data(directory):
+    """
+    Adds the people, movies and stars appended to the CSV files since
+    they were loaded, without reloading the rest. Returns the number of
+    rows applied.
+    """
+    applied = 0
+    for row in read_appended(directory, "people.csv"):
+        add_person(row["id"], row["name"], row["birth"])
+        applied += 1
+    for row in read_appended(directory, "movies.csv"):
+        add_movie(row["id"], row["title"], row["year"])
+        applied += 1
+    for row in read_appended(directory, "stars.csv"):
+        try:
+            add_star(row["person_id"], row["movie_id"])
+        except KeyError:
+            pass
+        applied += 1
+    return applied
+
+
+def read_appended(directory, filename):
+    """
+    Returns the complete rows of a CSV file past its loaded size as
+    dictionaries, and marks them as loaded.
+    """
+    path = os.path.join(directory, filename)
+    start = loaded_sizes[filename]
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8")
+        f.seek(0, os.SEEK_END)
+        if f.tell() < start:
+            raise Exception(f"{filename} was rewritten, load_data it again")
+        f.seek(start)
+        tail = f.read()
+
+    # a row still being written has no newline yet, leave it for next time
+    tail = tail[:tail.rfind(b"\n") + 1]
+    loaded_sizes[filename] = start + len(tail)
+    return list(csv.DictReader([header] + tail.decode("utf-8").splitlines(keepends=True)))
+
+
+def add_person(person_id, name, birth=""):
+    """
+    Adds a person to the loaded data.
+    """
+    if person_id in graph.person_index:
+        return
+    person = graph.add_person(person_id)
+    people[person_id] = {"name": name, "birth": birth}
+    names.setdefault(name.lower(), set()).add(person_id)
+    if name_index is not None:
+        name_index.add(name, person)
+    if landmark_index is not None:
+        landmark_index.add_person()
+
+
+def add_movie(movie_id, title, year=""):
+    """
+    Adds a movie to the loaded data.
+    """
+    if movie_id in movies:
+        return
+    graph.add_movie(movie_id)
+    movies[movie_id] = {"title": title, "year": year}
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a person starred in a movie, linking them to its cast.
+
+    Cached paths the new links could shorten are dropped, and landmark
+    distances are repaired in place.
+    """
+    person = graph.person_index[person_id]
+    movie = graph.movie_for_id(movie_id)
+
+    added, co_stars = graph.add_star(person, movie)
+    if not added or not co_stars:
+        # already in the cast, or the first star of the movie, no new links
+        return
+
+    path_cache.invalidate()
+    if landmark_index is not None:
+        for co_star in co_stars:
+            landmark_index.add_edge(graph, person, co_star)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find the degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--batch", metavar="FILE", nargs="?", const="-",
+                        help="answer tab-separated name pairs from FILE (default stdin) as JSON lines")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes for --batch (0 for one per core)")
+    parser.add_argument("--cache-size", type=int, default=path_cache.maxsize,
+                        help="number of paths kept in the LRU path cache")
+    parser.add_argument("--streaming", action="store_true",
+                        help="keep only the search index in memory, reading names and titles from disk")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="with --streaming, refuse to build an index larger than MB megabytes")
+    parser.add_argument("--guided", action="store_true",
+                        help="use A* search guided by landmark distances")
+    parser.add_argument("--landmarks", type=int, default=8, metavar="K",
+                        help="number of landmarks for --guided (default 8)")
+    parser.add_argument("--stats", action="store_true",
+                        help="report search counters and load/search times on stderr "
+                             "(searches in --processes workers are not counted)")
+    args = parser.parse_args()
+    path_cache.maxsize = args.cache_size
+    if args.stats:
+        enable_stats()
+
+    # Load data from files into memory (progress goes to stderr when stdout carries results)
+    log = sys.stderr if args.batch else sys.stdout
+    print("Loading data...", file=log)
+    memory_budget = None if args.memory_budget is None else args.memory_budget * 1024 * 1024
+    load_data(args.directory, snapshot=not args.streaming, streaming=args.streaming,
+              memory_budget=memory_budget)
+    if args.guided:
+        get_landmarks(args.landmarks)
+    print("Data loaded.", file=log)
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    if args.batch:
+        with (sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")) as f:
+            for result in batch_paths(read_pairs(f), args.processes):
+                print(json.dumps(result), flush=True)
+        print(f"Path cache: {path_cache.info()}", file=log)
+        if stats is not None:
+            print(f"Search stats: {stats.report()}", file=log)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +332,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, guided=args.guided)
 
     if path is None:
         print("Not connected.")
@@ -83,18 +346,58 @@ def main():
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
+    if stats is not None:
+        print(f"Search stats: {stats.report()}", file=sys.stderr)
 
-def shortest_path(source, target):
+
+def shortest_path(source, target, bidirectional=True, guided=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If no possible path, returns None.
+
+    By default the search grows from both people at once and meets in the
+    middle; pass bidirectional=False for the single-ended BFS, or guided=True
+    for A* search steered by the landmark distances.
+    """
+
+    # search runs over the interned ints of the co-star index
+    source = graph.person_index.get(source)
+    target = graph.person_index.get(target)
+    if source is None or target is None:
+        return None
+    if source == target:
+        return []
+
+    path = path_cache.get(source, target)
+    if path is MISS:
+        started = time.perf_counter()
+        if guided:
+            path = astar_path(source, target)
+        elif bidirectional:
+            path = bidirectional_path(source, target)
+        else:
+            path = breadth_first_path(source, target)
+        if stats is not None:
+            stats.searches += 1
+            stats.search_time += time.perf_counter() - started
+        path_cache.put(source, target, path)
+
+    return None if path is None else graph.path_ids(path)
+
+
+def breadth_first_path(source, target):
+    """
+    Returns the shortest list of (movie, person) pairs of interned ints
+    that connect the source to the target, found by single-ended BFS.
+
     If no possible path, returns None.
     """
 
     # start with source person, use Breadth-first search (for shortest path)
     start = Node(source, None, None)
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
 
     # keep track of stars which are already explored (prevents repetition)
@@ -106,30 +409,349 @@ def shortest_path(source, target):
             return None
 
         # get all stars related to current one (by 1 degree)
+        if stats is not None:
+            stats.frontier(len(frontier))
+            stats.expanded += 1
+            stats.neighbour_allocations += 1
         person = frontier.remove()
-        neighbours = neighbors_for_person(person.state)
+        neighbours, shared = graph.neighbours_of(person.state)
 
         # add current star to explored
         exploredStars.add(person.state)
 
-        for neighbour in neighbours:
+        for neighbour, movie in zip(neighbours, shared):
             # check if target is found, if yes, return the path
-            if neighbour[1] == target:
+            if neighbour == target:
                 path_found = []
 
                 # trace back (first pair is the connection of current star with this neighbour/target)
-                path_found.append((neighbour[0], neighbour[1]))
+                path_found.append((movie, neighbour))
                 while person.parent is not None:
                     path_found.append((person.action, person.state))
                     person = person.parent
-                
+
                 # reverse so path goes from source to target
                 path_found.reverse()
                 return path_found
 
             # if not target, add to frontier (on certain stated conditions)
-            if not frontier.contains_state(neighbour[1]) and neighbour[1] not in exploredStars:
-                frontier.add(Node(neighbour[1], person, neighbour[0]))
+            if not frontier.contains_state(neighbour) and neighbour not in exploredStars:
+                frontier.add(Node(neighbour, person, movie))
+
+
+def astar_path(source, target):
+    """
+    Returns the shortest list of (movie, person) pairs of interned ints
+    that connect the source to the target, found by A* search using the
+    landmark lower bound as its heuristic.
+
+    If no possible path, returns None.
+    """
+
+    landmarks = get_landmarks()
+    estimate = landmarks.heuristic(source, target)
+    if estimate == math.inf:
+        return None
+
+    # frontier entries are (estimated total, -steps so far, person); preferring
+    # deeper entries among equal estimates heads straight for the target
+    frontier = [(estimate, 0, source)]
+    steps = {source: 0}
+    parents = {source: None}
+    explored = set()
+
+    while frontier:
+        if stats is not None:
+            stats.frontier(len(frontier))
+        _, _, person = heapq.heappop(frontier)
+        if person in explored:
+            continue
+        if person == target:
+            return graph.tree_path(parents, target)
+        explored.add(person)
+        if stats is not None:
+            stats.expanded += 1
+            stats.neighbour_allocations += 1
+
+        neighbours, shared = graph.neighbours_of(person)
+        for neighbour, movie in zip(neighbours, shared):
+            if neighbour in explored or steps.get(neighbour, math.inf) <= steps[person] + 1:
+                continue
+            estimate = landmarks.heuristic(neighbour, target)
+            if estimate == math.inf:
+                continue
+            steps[neighbour] = steps[person] + 1
+            parents[neighbour] = (movie, person)
+            heapq.heappush(frontier, (steps[neighbour] + estimate, -steps[neighbour], neighbour))
+
+    return None
+
+
+def get_landmarks(k=8):
+    """
+    Returns the landmark index, building it from k landmarks the first time.
+    """
+    global landmark_index
+
+    if landmark_index is None:
+        landmark_index = LandmarkIndex.build(graph, k)
+    return landmark_index
+
+
+def degrees_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between two
+    person_ids from the landmark distances, without searching. upper is None
+    when unknown, and both are math.inf when the two are not connected.
+    """
+    return get_landmarks().bounds(graph.person_index[source], graph.person_index[target])
+
+
+def bidirectional_path(source, target):
+    """
+    Returns the shortest list of (movie, person) pairs of interned ints
+    that connect the source to the target, found by running
+    breadth-first search from both ends until the frontiers meet.
+
+    If no possible path, returns None.
+    """
+
+    # each side maps a reached star to (movie_id, star one step closer to its own start)
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        # always grow the smaller frontier, that is what keeps the search cheap
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward, backward)
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward, forward)
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    # one side ran out of stars without ever reaching the other
+    return None
+
+
+def expand_layer(layer, visited, other):
+    """
+    Expands one whole BFS layer for one side of a bidirectional search.
+
+    Returns the next layer and the star where the two sides meet (or None).
+    The whole layer is expanded before deciding, so that the meeting star
+    picked is the one giving the shortest joined path.
+    """
+
+    next_layer = []
+    meeting = None
+    best = None
+
+    if stats is not None:
+        stats.frontier(len(layer))
+        stats.expanded += len(layer)
+        stats.neighbour_allocations += len(layer)
+
+    for person in layer:
+        neighbours, shared = graph.neighbours_of(person)
+        for neighbour, movie in zip(neighbours, shared):
+            if neighbour in visited:
+                continue
+            visited[neighbour] = (movie, person)
+            next_layer.append(neighbour)
+
+            # the two searches touched, remember the meeting with the shortest far side
+            if neighbour in other:
+                length = distance_to_start(neighbour, other)
+                if best is None or length < best:
+                    best = length
+                    meeting = neighbour
+
+    return next_layer, meeting
+
+
+def distance_to_start(person, visited):
+    """
+    Returns the number of steps from person back to the start of one search side.
+    """
+    steps = 0
+    while visited[person] is not None:
+        person = visited[person][1]
+        steps += 1
+    return steps
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the two halves of a bidirectional search at the meeting star
+    into a single list of (movie, person) pairs from source to target.
+    """
+
+    # trace back from the meeting star to the source, then reverse
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    # trace forward from the meeting star to the target
+    person = meeting
+    while backward[person] is not None:
+        movie, following = backward[person]
+        path.append((movie, following))
+        person = following
+
+    return path
+
+
+def enable_stats():
+    """
+    Starts collecting search counters and timers, returning the SearchStats.
+    """
+    global stats
+    stats = SearchStats()
+    return stats
+
+
+def read_pairs(lines):
+    """
+    Returns (source name, target name) pairs from tab-separated lines,
+    skipping blank ones.
+    """
+    pairs = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        source, _, target = line.partition("\t")
+        pairs.append((source.strip(), target.strip()))
+    return pairs
+
+
+def batch_paths(pairs, processes=1):
+    """
+    Answers many (source name, target name) queries, yielding one
+    result dictionary per pair.
+
+    Pairs are grouped by source so every distinct source costs a single BFS
+    tree, which stops once all of that source's targets are reached. With
+    more than one process the groups are spread over a pool of forked workers.
+    Results are yielded group by group; each carries the index of its pair.
+    """
+
+    # resolve names once, answer what the cache knows and group the rest by source
+    groups = {}
+    for i, (source_name, target_name) in enumerate(pairs):
+        result = {"index": i, "source": source_name, "target": target_name}
+        source, error = resolve_name(source_name)
+        if error is None:
+            target, error = resolve_name(target_name)
+        if error is not None:
+            result["error"] = error
+            yield result
+            continue
+        path = path_cache.get(source, target)
+        if path is not MISS:
+            yield path_result(result, path)
+            continue
+        groups.setdefault(source, []).append((result, target))
+
+    tasks = [(source, source, [target for _, target in queries]) for source, queries in groups.items()]
+    if processes == 1:
+        answered = search_groups(tasks)
+    else:
+        answered = imap_groups(graph, tasks, processes)
+
+    for source, paths in answered:
+        for (result, target), path in zip(groups[source], paths):
+            path_cache.put(source, target, path)
+            yield path_result(result, path)
+
+
+def shortest_paths(queries, processes=1):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs, as for
+    shortest_path, for every (source, target) pair of person_ids in
+    queries, in the same order. None marks people not connected.
+
+    Queries are grouped by source as in batch_paths, so sweeping from one
+    person to many others costs a single BFS tree. With more than one
+    process the groups are spread over a pool of forked workers.
+    """
+    paths = [None] * len(queries)
+
+    # answer what needs no search and group the rest by source
+    groups = {}
+    for i, (source_id, target_id) in enumerate(queries):
+        source = graph.person_index.get(source_id)
+        target = graph.person_index.get(target_id)
+        if source is None or target is None:
+            continue
+        path = path_cache.get(source, target) if source != target else []
+        if path is not MISS:
+            paths[i] = path
+            continue
+        groups.setdefault(source, []).append((i, target))
+
+    tasks = [(source, source, [target for _, target in group]) for source, group in groups.items()]
+    if processes == 1:
+        answered = search_groups(tasks)
+    else:
+        answered = imap_groups(graph, tasks, processes)
+
+    for source, group_paths in answered:
+        for (i, target), path in zip(groups[source], group_paths):
+            path_cache.put(source, target, path)
+            paths[i] = path
+
+    return [None if path is None else graph.path_ids(path) for path in paths]
+
+
+def search_groups(tasks):
+    """
+    Answers (key, source, targets) groups in this process, keeping every
+    BFS tree in the path cache so later queries under that source reuse it.
+    """
+    for key, source, targets in tasks:
+        started = time.perf_counter()
+        tree = graph.search_tree(source, targets, stats)
+        if stats is not None:
+            stats.searches += 1
+            stats.search_time += time.perf_counter() - started
+        path_cache.put_tree(source, tree)
+        yield key, [graph.tree_path(tree, target) for target in targets]
+
+
+def path_result(result, path):
+    """
+    Fills the degrees and path of a batch result dictionary from an interned path.
+    """
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [{"movie_id": movie_id, "person_id": person_id}
+                          for movie_id, person_id in graph.path_ids(path)]
+    return result
+
+
+def resolve_name(name):
+    """
+    Resolves a name to an interned person without prompting.
+    Returns (person, None), or (None, error message) if the name is
+    unknown or ambiguous.
+    """
+    person_ids = names.get(name.lower(), set())
+    if len(person_ids) == 0:
+        return None, "person not found"
+    elif len(person_ids) > 1:
+        return None, f"ambiguous name, candidates: {', '.join(sorted(person_ids))}"
+    return graph.person_index[next(iter(person_ids))], None
 
 
 def person_id_for_name(name):
@@ -139,6 +761,9 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = candidates_for_name(name, 5)
+        if suggestions:
+            print("Did you mean: " + ", ".join(people[person_id]["name"] for person_id in suggestions) + "?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -158,16 +783,29 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to limit person_ids ranked for a partial or
+    misspelled name, best match first.
+    """
+    global name_index
+
+    if name_index is None:
+        name_index = NameIndex.from_names(names, graph.person_ids, graph.person_index)
+    return name_index.search(name, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
+    if stats is not None:
+        stats.neighbour_allocations += 1
+    neighbours, shared = graph.neighbours_of(graph.person_index[person_id])
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for neighbour, movie in zip(neighbours, shared):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[neighbour]))
     return neighbors
 
 
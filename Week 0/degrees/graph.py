@@ -0,0 +1,291 @@
+from array import array
+
+
+def tree_path(tree, target):
+    """
+    Returns the list of interned (movie, person) pairs leading from the
+    root of a BFS tree to target, or None if the tree never reached it.
+    """
+    if target not in tree:
+        return None
+    path = []
+    while tree[target] is not None:
+        movie, parent = tree[target]
+        path.append((movie, target))
+        target = parent
+    path.reverse()
+    return path
+
+
+def group_casts(movie_count, edge_people, edge_movies):
+    """
+    Counting sorts star rows (parallel arrays of interned people and movies)
+    by movie into a CSR list of casts, returning (cast_offsets, cast_people).
+    """
+    cast_offsets = array("q", [0]) * (movie_count + 1)
+    for movie in edge_movies:
+        cast_offsets[movie + 1] += 1
+    for movie in range(movie_count):
+        cast_offsets[movie + 1] += cast_offsets[movie]
+    cast_people = array("i", [0]) * len(edge_people)
+    position = array("q", cast_offsets[:-1])
+    for person, movie in zip(edge_people, edge_movies):
+        cast_people[position[movie]] = person
+        position[movie] += 1
+    del position
+
+    # Repeated star rows would otherwise show up as repeated co-star edges
+    repeated = False
+    for movie in range(movie_count):
+        start, end = cast_offsets[movie], cast_offsets[movie + 1]
+        cast = cast_people[start:end]
+        unique = array("i", dict.fromkeys(cast))
+        if len(unique) != len(cast):
+            repeated = True
+            cast_people[start:start + len(unique)] = unique
+            cast_people[start + len(unique):end] = array("i", [-1]) * (end - start - len(unique))
+    if repeated:
+        cast_offsets, cast_people = compact_casts(cast_offsets, cast_people)
+    return cast_offsets, cast_people
+
+
+def compact_casts(cast_offsets, cast_people):
+    """
+    Drops the -1 padding left in casts by removing repeated stars.
+    """
+    offsets = array("q", [0])
+    compacted = array("i")
+    for movie in range(len(cast_offsets) - 1):
+        compacted.extend(person for person in cast_people[cast_offsets[movie]:cast_offsets[movie + 1]]
+                         if person != -1)
+        offsets.append(len(compacted))
+    return offsets, compacted
+
+
+class CoStarGraph():
+    """
+    Compact co-star adjacency in CSR (compressed sparse row) form.
+
+    Person and movie ids are interned to consecutive ints. The co-stars of
+    person i are neighbours[offsets[i]:offsets[i + 1]], and the movie they
+    share is at the same position in movies. The cast of movie m is kept
+    as cast_people[cast_offsets[m]:cast_offsets[m + 1]].
+
+    People, movies and stars added after the build go to small overlay
+    dictionaries (added and added_casts) until the graph is compacted.
+    """
+
+    def __init__(self, person_ids, movie_ids, offsets, neighbours, movies,
+                 cast_offsets, cast_people, person_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        self.person_index = person_index
+        self.movie_index = None
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.movies = movies
+        self.cast_offsets = cast_offsets
+        self.cast_people = cast_people
+        self.added = {}
+        self.added_casts = {}
+
+    @classmethod
+    def from_stars(cls, person_ids, movie_ids, edge_people, edge_movies,
+                   person_index=None, memory_budget=None):
+        """
+        Builds the adjacency from star rows given as two parallel arrays of
+        interned people and movies. Repeated rows are counted once.
+        """
+        cast_offsets, cast_people = group_casts(len(movie_ids), edge_people, edge_movies)
+        return cls.from_casts(person_ids, movie_ids, cast_offsets, cast_people,
+                              person_index, memory_budget)
+
+    @classmethod
+    def from_casts(cls, person_ids, movie_ids, cast_offsets, cast_people,
+                   person_index=None, memory_budget=None):
+        """
+        Builds the adjacency from the cast of every movie, given as
+        cast_people[cast_offsets[m]:cast_offsets[m + 1]] for interned movie m.
+
+        If memory_budget (in bytes) is given, raises MemoryError before
+        allocating an adjacency that would not fit in it.
+        """
+
+        # first pass, count co-star edges per person to lay out the offsets
+        degree = array("q", [0]) * len(person_ids)
+        for movie in range(len(movie_ids)):
+            start, end = cast_offsets[movie], cast_offsets[movie + 1]
+            for k in range(start, end):
+                degree[cast_people[k]] += end - start - 1
+
+        edges = sum(degree)
+        needed = 8 * (len(person_ids) + 1) + 8 * edges
+        if memory_budget is not None and needed > memory_budget:
+            raise MemoryError(f"co-star adjacency needs {needed} bytes, "
+                              f"over the budget of {memory_budget}")
+
+        offsets = array("q", [0]) * (len(person_ids) + 1)
+        for i, count in enumerate(degree):
+            offsets[i + 1] = offsets[i] + count
+        del degree
+
+        # second pass, drop every co-star into its person's slice
+        neighbours = array("i", [0]) * edges
+        shared = array("i", [0]) * edges
+        position = array("q", offsets[:-1])
+        for movie in range(len(movie_ids)):
+            cast = cast_people[cast_offsets[movie]:cast_offsets[movie + 1]]
+            for person in cast:
+                k = position[person]
+                for co_star in cast:
+                    if co_star != person:
+                        neighbours[k] = co_star
+                        shared[k] = movie
+                        k += 1
+                position[person] = k
+
+        return cls(person_ids, movie_ids, offsets, neighbours, shared,
+                   cast_offsets, cast_people, person_index)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def neighbours_of(self, person):
+        """
+        Returns the (co-star, movie) int slices for an interned person.
+        """
+        start, end = self.offsets[person], self.offsets[person + 1]
+        if person in self.added:
+            added = self.added[person]
+            return (list(self.neighbours[start:end]) + [co_star for co_star, _ in added],
+                    list(self.movies[start:end]) + [movie for _, movie in added])
+        return self.neighbours[start:end], self.movies[start:end]
+
+    def degree(self, person):
+        return self.offsets[person + 1] - self.offsets[person] + len(self.added.get(person, ()))
+
+    def cast(self, movie):
+        """
+        Returns the interned people starring in an interned movie.
+        """
+        cast = []
+        if movie < len(self.cast_offsets) - 1:
+            cast.extend(self.cast_people[self.cast_offsets[movie]:self.cast_offsets[movie + 1]])
+        cast.extend(self.added_casts.get(movie, ()))
+        return cast
+
+    def add_person(self, person_id):
+        """
+        Interns a new person, returning its int. New people get an empty CSR row.
+        """
+        if person_id in self.person_index:
+            return self.person_index[person_id]
+
+        # arrays mapped from a snapshot are read-only, copy the offsets to grow them
+        if not isinstance(self.offsets, array):
+            self.offsets = array("q", self.offsets)
+        self.offsets.append(self.offsets[-1])
+
+        person = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_index[person_id] = person
+        return person
+
+    def movie_for_id(self, movie_id):
+        """
+        Returns the int a movie id is interned to.
+        """
+        if self.movie_index is None:
+            self.movie_index = {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+        return self.movie_index[movie_id]
+
+    def add_movie(self, movie_id):
+        """
+        Interns a new movie, returning its int.
+        """
+        try:
+            return self.movie_for_id(movie_id)
+        except KeyError:
+            pass
+        movie = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_index[movie_id] = movie
+        return movie
+
+    def add_star(self, person, movie):
+        """
+        Adds an interned person to the cast of an interned movie.
+        Returns whether they were added (False if already in the cast)
+        and the co-stars they are newly linked to.
+        """
+        cast = self.cast(movie)
+        if person in cast:
+            return False, []
+        for co_star in cast:
+            self.added.setdefault(person, []).append((co_star, movie))
+            self.added.setdefault(co_star, []).append((person, movie))
+        self.added_casts.setdefault(movie, []).append(person)
+        return True, cast
+
+    def compacted(self):
+        """
+        Returns a graph with the same data and every addition folded into the CSR arrays.
+        """
+        cast_offsets = array("q", [0])
+        cast_people = array("i")
+        for movie in range(len(self.movie_ids)):
+            cast_people.extend(self.cast(movie))
+            cast_offsets.append(len(cast_people))
+        graph = CoStarGraph.from_casts(self.person_ids, self.movie_ids, cast_offsets,
+                                       cast_people, self.person_index)
+        graph.movie_index = self.movie_index
+        return graph
+
+    def path_ids(self, path):
+        """
+        Converts a list of interned (movie, person) pairs back
+        to (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+    def search_tree(self, source, targets=None, stats=None):
+        """
+        Runs breadth-first search from an interned source and returns the
+        BFS tree as a dictionary of person -> (movie, parent person),
+        with the source mapped to None.
+
+        If targets is given, the search stops as soon as all of them are reached.
+        Expansions and frontier sizes are counted in stats, if given.
+        """
+        tree = {source: None}
+        remaining = None if targets is None else set(targets) - {source}
+        layer = [source]
+
+        while layer and (remaining is None or remaining):
+            if stats is not None:
+                stats.expanded += len(layer)
+                stats.frontier(len(layer))
+            next_layer = []
+            for person in layer:
+                start, end = self.offsets[person], self.offsets[person + 1]
+                for k in range(start, end):
+                    neighbour = self.neighbours[k]
+                    if neighbour in tree:
+                        continue
+                    tree[neighbour] = (self.movies[k], person)
+                    next_layer.append(neighbour)
+                    if remaining is not None:
+                        remaining.discard(neighbour)
+                for neighbour, movie in self.added.get(person, ()):
+                    if neighbour not in tree:
+                        tree[neighbour] = (movie, person)
+                        next_layer.append(neighbour)
+                        if remaining is not None:
+                            remaining.discard(neighbour)
+            layer = next_layer
+
+        return tree
+
+    tree_path = staticmethod(tree_path)
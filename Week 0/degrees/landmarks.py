@@ -0,0 +1,134 @@
+import math
+from array import array
+
+# Distance stored for people a landmark cannot reach (real distances stay below it)
+UNREACHABLE = 255
+
+
+def distances_from(graph, source):
+    """
+    Returns the BFS distance from an interned source to every person
+    as a uint8 array, UNREACHABLE where there is no path.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph)
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer and depth < UNREACHABLE - 1:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for k in range(graph.offsets[person], graph.offsets[person + 1]):
+                neighbour = graph.neighbours[k]
+                if distances[neighbour] == UNREACHABLE:
+                    distances[neighbour] = depth
+                    next_layer.append(neighbour)
+            for neighbour, _ in graph.added.get(person, ()):
+                if distances[neighbour] == UNREACHABLE:
+                    distances[neighbour] = depth
+                    next_layer.append(neighbour)
+        layer = next_layer
+    return distances
+
+
+class LandmarkIndex():
+    """
+    BFS distances from a few well-connected landmark people.
+
+    By the triangle inequality |d(L, a) - d(L, b)| <= d(a, b) <= d(L, a) + d(L, b)
+    for every landmark L, so k landmarks bound any distance in O(k), and the
+    lower bound is an admissible (and consistent) heuristic for A*.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k=8):
+        """
+        Picks the k highest-degree people, skipping any co-star of a landmark
+        already picked so the landmarks spread out, and runs BFS from each.
+        """
+        landmarks = []
+        distances = []
+        for person in sorted(range(len(graph)), key=graph.degree, reverse=True):
+            if len(landmarks) == k or graph.degree(person) == 0:
+                break
+            if any(d[person] <= 1 for d in distances):
+                continue
+            landmarks.append(person)
+            distances.append(distances_from(graph, person))
+        return cls(landmarks, distances)
+
+    def add_person(self):
+        """
+        Extends every distance table for a newly interned person, who is
+        unreachable until they star in something.
+        """
+        for distances in self.distances:
+            distances.append(UNREACHABLE)
+
+    def add_edge(self, graph, a, b):
+        """
+        Repairs the distance tables after a co-star edge between a and b was
+        added to graph. Distances can only shrink, so only the people whose
+        distance drops are revisited.
+        """
+        for distances in self.distances:
+            for near, far in ((a, b), (b, a)):
+                if distances[near] == UNREACHABLE or distances[near] + 1 >= distances[far]:
+                    continue
+                distances[far] = distances[near] + 1
+                layer = [far]
+                while layer:
+                    next_layer = []
+                    for person in layer:
+                        depth = distances[person] + 1
+                        if depth >= UNREACHABLE:
+                            continue
+                        neighbours, _ = graph.neighbours_of(person)
+                        for neighbour in neighbours:
+                            if depth < distances[neighbour]:
+                                distances[neighbour] = depth
+                                next_layer.append(neighbour)
+                    layer = next_layer
+
+    def bounds(self, a, b):
+        """
+        Returns (lower, upper) bounds on the degrees between interned people
+        a and b. upper is None when no landmark reaches both, and both are
+        math.inf when a landmark proves them unconnected.
+        """
+        lower = 0
+        upper = None
+        for distances in self.distances:
+            da, db = distances[a], distances[b]
+            if da == UNREACHABLE and db == UNREACHABLE:
+                continue
+            if da == UNREACHABLE or db == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(da - db))
+            if upper is None or da + db < upper:
+                upper = da + db
+        if a == b:
+            return 0, 0
+        return max(lower, 1), upper
+
+    def heuristic(self, person, target):
+        """
+        Returns a lower bound on the degrees from person to target,
+        or math.inf if a landmark shows target cannot be reached.
+        """
+        bound = 0
+        for distances in self.distances:
+            dp, dt = distances[person], distances[target]
+            if dp == UNREACHABLE or dt == UNREACHABLE:
+                if dp != dt:
+                    return math.inf
+                continue
+            if dp - dt > bound:
+                bound = dp - dt
+            elif dt - dp > bound:
+                bound = dt - dp
+        return bound
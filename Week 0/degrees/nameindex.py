@@ -0,0 +1,191 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Most postings a fuzzy lookup scans, rarest trigrams first: common trigrams
+# barely help matching, and scanning their postings would dominate lookup time
+MAX_POSTINGS = 10000
+
+# Names sharing the most scanned trigrams that get their similarity checked
+CANDIDATES = 100
+
+# Fuzzy candidates need at least this trigram similarity to be returned
+MIN_SIMILARITY = 0.3
+
+
+def normalise(name):
+    """
+    Lowercases a name and collapses its whitespace.
+    """
+    return " ".join(name.lower().split())
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a normalised name, padded so that
+    the start and end of the name count for more.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Name lookup index for partial and misspelled names.
+
+    keys is the sorted list of distinct normalised names; the interned people
+    with key i are people[key_offsets[i]:key_offsets[i + 1]]. Prefix lookups
+    bisect keys. For fuzzy lookups, trigrams is the sorted list of distinct
+    trigrams, and the keys containing trigram j are
+    trigram_keys[trigram_offsets[j]:trigram_offsets[j + 1]].
+
+    People added after the build go to a small overlay (added, with its own
+    sorted added_keys and added_trigrams postings) that lookups merge in,
+    until the index is built again.
+    """
+
+    def __init__(self, person_ids, keys, key_offsets, people,
+                 trigrams, trigram_offsets, trigram_keys):
+        self.person_ids = person_ids
+        self.keys = keys
+        self.key_offsets = key_offsets
+        self.people = people
+        self.trigrams = trigrams
+        self.trigram_offsets = trigram_offsets
+        self.trigram_keys = trigram_keys
+        self.added = {}
+        self.added_keys = []
+        self.added_trigrams = {}
+
+    @classmethod
+    def from_names(cls, names, person_ids, person_index):
+        """
+        Builds the index from the names dictionary filled by load_data.
+        """
+        grouped = {}
+        for name, ids in names.items():
+            grouped.setdefault(normalise(name), set()).update(person_index[i] for i in ids)
+        keys = sorted(grouped)
+
+        key_offsets = array("q", [0])
+        people = array("i")
+        postings = {}
+        for i, key in enumerate(keys):
+            people.extend(sorted(grouped[key]))
+            key_offsets.append(len(people))
+            for gram in trigrams(key):
+                postings.setdefault(gram, array("i")).append(i)
+
+        grams = sorted(postings)
+        trigram_offsets = array("q", [0])
+        trigram_keys = array("i")
+        for gram in grams:
+            trigram_keys.extend(postings[gram])
+            trigram_offsets.append(len(trigram_keys))
+
+        return cls(person_ids, keys, key_offsets, people, grams, trigram_offsets, trigram_keys)
+
+    def add(self, name, person):
+        """
+        Adds an interned person under name, without rebuilding the index.
+        """
+        key = normalise(name)
+        if key not in self.added:
+            self.added[key] = []
+            insort(self.added_keys, key)
+            for gram in trigrams(key):
+                self.added_trigrams.setdefault(gram, []).append(key)
+        self.added[key].append(person)
+
+    def people_for_key(self, key):
+        """
+        Returns the person ids with a normalised name.
+        """
+        found = []
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            found.extend(self.people[self.key_offsets[i]:self.key_offsets[i + 1]])
+        found.extend(self.added.get(key, ()))
+        return [self.person_ids[person] for person in found]
+
+    def prefix(self, name, limit=10):
+        """
+        Returns up to limit names starting with name, in sorted order.
+        """
+        name = normalise(name)
+        found = set()
+        for keys in (self.keys, self.added_keys):
+            i = bisect_left(keys, name)
+            end = min(len(keys), i + limit)
+            while i < end and keys[i].startswith(name):
+                found.add(keys[i])
+                i += 1
+        return sorted(found)[:limit]
+
+    def fuzzy(self, name, limit=10):
+        """
+        Returns up to limit (similarity, name) pairs for names sharing
+        enough trigrams with name, most similar first.
+
+        Candidates are the names sharing the most of the rarest trigrams of
+        name (up to MAX_POSTINGS postings in all), then each is scored on
+        all of its trigrams.
+        """
+        name = normalise(name)
+        grams = trigrams(name)
+        postings = []
+        for gram in grams:
+            j = bisect_left(self.trigrams, gram)
+            if j < len(self.trigrams) and self.trigrams[j] == gram:
+                start, end = self.trigram_offsets[j], self.trigram_offsets[j + 1]
+                postings.append((end - start, start, end))
+
+        shared = Counter()
+        budget = MAX_POSTINGS
+        for length, start, end in sorted(postings):
+            if length > budget and shared:
+                break
+            budget -= length
+            shared.update(self.trigram_keys[start:end])
+
+        # the overlay is small, all of its postings are scanned
+        added = Counter()
+        for gram in grams:
+            added.update(self.added_trigrams.get(gram, ()))
+
+        candidates = {self.keys[i] for i, _ in shared.most_common(CANDIDATES)}
+        candidates.update(key for key, _ in added.most_common(CANDIDATES))
+
+        scored = []
+        for key in candidates:
+            key_grams = trigrams(key)
+            count = len(grams & key_grams)
+            similarity = count / (len(grams) + len(key_grams) - count)
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, key))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return scored[:limit]
+
+    def search(self, name, limit=10):
+        """
+        Returns up to limit person ids ranked for a partial or misspelled name:
+        the exact match first, then names it is a prefix of (shortest first),
+        then names sharing the most trigrams with it. Trigrams are only
+        tried when there is no exact match and too few prefix matches.
+        """
+        ranked = []
+        seen = set()
+
+        def take(key):
+            if key not in seen:
+                seen.add(key)
+                ranked.extend(self.people_for_key(key))
+
+        for key in sorted(self.prefix(name, limit), key=len):
+            take(key)
+        if len(ranked) >= limit or normalise(name) in seen:
+            return ranked[:limit]
+
+        for _, key in self.fuzzy(name, limit):
+            take(key)
+        return ranked[:limit]
@@ -0,0 +1,47 @@
+import gc
+import multiprocessing
+import os
+
+# Graph the worker processes search, set in the parent just before the pool is
+# forked so every worker shares the parent's pages copy-on-write instead of
+# reloading the data. The CSR arrays are single objects, so reading them never
+# touches reference counts in the shared pages, and the objects inherited from
+# the parent are frozen out of the workers' garbage collections.
+shared_graph = None
+
+
+def search_group(group):
+    """
+    Worker task: answers every target of one source from a single BFS tree.
+    Returns the group key and a list of interned paths (None when not connected).
+    """
+    key, source, targets = group
+    tree = shared_graph.search_tree(source, targets)
+    return key, [shared_graph.tree_path(tree, target) for target in targets]
+
+
+def imap_groups(graph, groups, processes=None, chunksize=4):
+    """
+    Fans (key, source, targets) groups out across a pool of forked workers,
+    yielding (key, paths) pairs in whatever order they finish.
+
+    Without fork (e.g. on Windows) the groups are answered in this process.
+    """
+    global shared_graph
+
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        shared_graph = graph
+        yield from map(search_group, groups)
+        return
+
+    shared_graph = graph
+
+    # a collection in a worker would write to every tracked object it inherited
+    gc.freeze()
+    try:
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            yield from pool.imap_unordered(search_group, groups, chunksize)
+    finally:
+        gc.unfreeze()
+
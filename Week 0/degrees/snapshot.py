@@ -0,0 +1,205 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+
+# Bump whenever the layout of the snapshot changes, older files are then ignored
+VERSION = 3
+
+MAGIC = b"DEGSNAP\0"
+FILENAME = "degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Sections holding int arrays, and the array typecode of each
+ARRAYS = {
+    "offsets": "q",
+    "neighbours": "i",
+    "movies": "i",
+    "cast_offsets": "q",
+    "cast_people": "i",
+    "name_offsets": "q",
+    "name_people": "i",
+    "trigram_offsets": "q",
+    "trigram_keys": "i",
+}
+
+# Sections holding lists of strings
+STRINGS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+    "names", "trigrams",
+]
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def fingerprint(path, digest=True, size=None):
+    """
+    Returns size, modification time and (optionally) a sha1 digest of a file,
+    or of only its first size bytes.
+    """
+    stat = os.stat(path)
+    result = {"size": stat.st_size if size is None else size, "mtime_ns": stat.st_mtime_ns}
+    if digest:
+        sha1 = hashlib.sha1()
+        remaining = result["size"]
+        with open(path, "rb") as f:
+            while remaining:
+                block = f.read(min(remaining, 1 << 20))
+                if not block:
+                    break
+                sha1.update(block)
+                remaining -= len(block)
+        result["sha1"] = sha1.hexdigest()
+    return result
+
+
+def check_sources(directory, sources):
+    """
+    Checks the CSV files against the fingerprints taken when the snapshot
+    was written.
+
+    Returns the size each file had then (the offset of any rows appended
+    since), or None if a file was otherwise changed. Matching size and mtime
+    is enough; otherwise the recorded prefix of the file is hashed.
+    """
+    sizes = {}
+    for filename in SOURCES:
+        path = os.path.join(directory, filename)
+        recorded = sources.get(filename)
+        if recorded is None or not os.path.exists(path):
+            return None
+        current = fingerprint(path, digest=False)
+        if current["size"] < recorded["size"]:
+            return None
+        if current != {"size": recorded["size"], "mtime_ns": recorded["mtime_ns"]}:
+            if fingerprint(path, size=recorded["size"])["sha1"] != recorded["sha1"]:
+                return None
+        sizes[filename] = recorded["size"]
+    return sizes
+
+
+def encode_strings(strings):
+    return "\0".join(strings).encode("utf-8")
+
+
+def decode_strings(data, count):
+    if count == 0:
+        return []
+    return bytes(data).decode("utf-8").split("\0")
+
+
+def save_snapshot(directory, graph, people, movies, name_index, sizes=None):
+    """
+    Writes the interned ids, the co-star adjacency, the display fields
+    and the name index to a versioned binary file next to the CSVs.
+
+    sizes gives how many bytes of each CSV the data covers, if not all of it.
+    """
+    sizes = sizes or {}
+
+    sections = {
+        "offsets": graph.offsets,
+        "neighbours": graph.neighbours,
+        "movies": graph.movies,
+        "cast_offsets": graph.cast_offsets,
+        "cast_people": graph.cast_people,
+        "name_offsets": name_index.key_offsets,
+        "name_people": name_index.people,
+        "trigram_offsets": name_index.trigram_offsets,
+        "trigram_keys": name_index.trigram_keys,
+        "person_ids": graph.person_ids,
+        "person_names": [people[person_id]["name"] for person_id in graph.person_ids],
+        "person_births": [people[person_id]["birth"] for person_id in graph.person_ids],
+        "movie_ids": graph.movie_ids,
+        "movie_titles": [movies[movie_id]["title"] for movie_id in graph.movie_ids],
+        "movie_years": [movies[movie_id]["year"] for movie_id in graph.movie_ids],
+        "names": name_index.keys,
+        "trigrams": name_index.trigrams,
+    }
+
+    # lay out every section back to back, each aligned to 8 bytes
+    blobs = []
+    layout = {}
+    position = 0
+    for name, value in sections.items():
+        if name in ARRAYS:
+            blob = array(ARRAYS[name], value).tobytes()
+        else:
+            blob = encode_strings(value)
+        layout[name] = [position, len(blob), len(value)]
+        blobs.append(blob + b"\0" * (-len(blob) % 8))
+        position += len(blob) + (-len(blob) % 8)
+
+    header = json.dumps({
+        "version": VERSION,
+        "sources": {filename: fingerprint(os.path.join(directory, filename), size=sizes.get(filename))
+                    for filename in SOURCES},
+        "sections": layout,
+    }).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 8 + len(header)) % 8)
+
+    # write to a temporary file first so a crash never leaves half a snapshot
+    path = snapshot_path(directory)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temporary, path)
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps the snapshot for a data directory.
+
+    Returns a dictionary of its sections (int arrays as memoryviews straight
+    over the mapped file) and the CSV sizes it covers under "sizes", or None
+    if there is no usable snapshot. A snapshot stays usable when rows were
+    only appended to the CSVs; the caller replays them from those sizes.
+    """
+    path = snapshot_path(directory)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        try:
+            size, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(size))
+        except (struct.error, ValueError):
+            return None
+        if header.get("version") != VERSION:
+            return None
+        sizes = check_sources(directory, header["sources"])
+        if sizes is None:
+            return None
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # a truncated or damaged file must not restore as a smaller graph
+    base = len(MAGIC) + 8 + size
+    view = memoryview(mapped)
+    sections = {"sizes": sizes}
+    try:
+        for name, (start, length, count) in header["sections"].items():
+            if start < 0 or length < 0 or base + start + length > len(mapped):
+                return None
+            data = view[base + start:base + start + length]
+            if name in ARRAYS:
+                sections[name] = data.cast(ARRAYS[name])
+            else:
+                sections[name] = decode_strings(data, count)
+            if len(sections[name]) != count:
+                return None
+    except (KeyError, TypeError, ValueError):
+        return None
+    if any(name not in sections for name in [*ARRAYS, *STRINGS]):
+        return None
+    return sections
@@ -0,0 +1,134 @@
+import csv
+import os
+from array import array
+from collections.abc import Mapping
+
+from graph import CoStarGraph
+
+
+def read_header(f):
+    """
+    Returns the column names of a CSV file opened in binary mode.
+    """
+    return next(csv.reader([f.readline().decode("utf-8")]))
+
+
+def read_rows(f, offsets):
+    """
+    Yields the CSV rows of a file opened in binary mode (after its header),
+    appending the byte offset where each row starts to offsets.
+    """
+    position = {"end": f.tell()}
+
+    def lines():
+        for line in f:
+            position["end"] += len(line)
+            yield line.decode("utf-8")
+
+    # csv pulls exactly the lines of a row before returning it, so the end of
+    # the previous row is where the next one starts (even for quoted newlines)
+    start = position["end"]
+    for row in csv.reader(lines()):
+        offsets.append(start)
+        start = position["end"]
+        yield row
+
+
+class RowIndex(Mapping):
+    """
+    Mapping of an id to the display fields of its CSV row, read from disk
+    on demand through a byte offset index. Rows added after loading are
+    kept in memory.
+    """
+
+    def __init__(self, path, index, offsets, header):
+        self.path = path
+        self.index = index
+        self.offsets = offsets
+        self.header = header
+        self.added = {}
+
+    def __setitem__(self, key, fields):
+        self.added[key] = fields
+
+    def __getitem__(self, key):
+        if key in self.added:
+            return self.added[key]
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[self.index[key]])
+            row = next(csv.reader(line.decode("utf-8") for line in f))
+        return {field: value for field, value in zip(self.header, row) if field != "id"}
+
+    def __contains__(self, key):
+        return key in self.index or key in self.added
+
+    def __iter__(self):
+        yield from self.index
+        yield from (key for key in self.added if key not in self.index)
+
+    def __len__(self):
+        return len(self.index) + sum(1 for key in self.added if key not in self.index)
+
+
+def stream_data(directory, memory_budget=None):
+    """
+    Loads the data keeping only what search needs in memory: interned ids,
+    the names index and the co-star adjacency in flat int arrays. Names,
+    births, titles and years stay on disk behind byte offset indexes.
+
+    Returns (graph, names, people, movies) where people and movies are
+    RowIndex mappings. Raises MemoryError if the adjacency would not fit
+    in memory_budget bytes.
+    """
+    names = {}
+
+    # Load people, keeping only the id, its offset and the lowercase name
+    people_path = os.path.join(directory, "people.csv")
+    person_ids = []
+    person_index = {}
+    person_offsets = array("q")
+    with open(people_path, "rb") as f:
+        people_header = read_header(f)
+        id_column, name_column = people_header.index("id"), people_header.index("name")
+        for row in read_rows(f, person_offsets):
+            person_id = row[id_column]
+            person_index[person_id] = len(person_ids)
+            person_ids.append(person_id)
+            names.setdefault(row[name_column].lower(), set()).add(person_id)
+
+    # Load movies, keeping only the id and its offset
+    movies_path = os.path.join(directory, "movies.csv")
+    movie_ids = []
+    movie_index = {}
+    movie_offsets = array("q")
+    with open(movies_path, "rb") as f:
+        movies_header = read_header(f)
+        id_column = movies_header.index("id")
+        for row in read_rows(f, movie_offsets):
+            movie_id = row[id_column]
+            movie_index[movie_id] = len(movie_ids)
+            movie_ids.append(movie_id)
+
+    # Load stars as two parallel int arrays, skipping rows with unknown ids
+    edge_people = array("i")
+    edge_movies = array("i")
+    with open(os.path.join(directory, "stars.csv"), encoding="utf-8") as f:
+        reader = csv.reader(f)
+        stars_header = next(reader)
+        person_column, movie_column = stars_header.index("person_id"), stars_header.index("movie_id")
+        for row in reader:
+            try:
+                person, movie = person_index[row[person_column]], movie_index[row[movie_column]]
+            except KeyError:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    graph = CoStarGraph.from_stars(person_ids, movie_ids, edge_people, edge_movies,
+                                   person_index, memory_budget)
+    graph.movie_index = movie_index
+
+    people = RowIndex(people_path, person_index, person_offsets, people_header)
+    movies = RowIndex(movies_path, movie_index, movie_offsets, movies_header)
+    return graph, names, people, movies
+
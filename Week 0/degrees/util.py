@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +39,77 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class IndexedStackFrontier():
+    """
+    Stack frontier backed by a deque, with a count of the states it holds
+    so that add, remove and contains_state are all constant time.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def pop(self):
+        return self.frontier.pop()
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.pop()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
+            return node
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+
+    def pop(self):
+        return self.frontier.popleft()
+
+
+class SearchStats():
+    """
+    Counters and timers for searches, enabled by passing an instance
+    where a search accepts one.
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.expanded = 0
+        self.max_frontier = 0
+        self.neighbour_allocations = 0
+        self.load_time = 0.0
+        self.search_time = 0.0
+
+    def frontier(self, size):
+        if size > self.max_frontier:
+            self.max_frontier = size
+
+    def report(self):
+        return {
+            "searches": self.searches,
+            "nodes_expanded": self.expanded,
+            "max_frontier": self.max_frontier,
+            "neighbour_allocations": self.neighbour_allocations,
+            "load_seconds": round(self.load_time, 6),
+            "search_seconds": round(self.search_time, 6),
+        }
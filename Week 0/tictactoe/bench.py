@@ -0,0 +1,94 @@
+import argparse
+import time
+
+import engine
+import mnk
+import parallel
+
+# Fixed positions: (rows, cols, k, moves played alternately from X)
+POSITIONS = [
+    (4, 4, 4, [(1, 1), (2, 2)]),
+    (5, 5, 4, [(2, 2), (1, 2), (2, 1)]),
+    (6, 6, 4, [(2, 2), (3, 3), (2, 3), (2, 4)]),
+    (9, 9, 5, [(4, 4), (4, 5), (3, 4), (5, 4), (3, 3)]),
+    (15, 15, 5, [(7, 7), (7, 8), (6, 7), (8, 7), (6, 6), (5, 5)]),
+]
+
+# Positions with a winning move for X: (rows, cols, k, X cells, O cells, winning cell),
+# long lines check that wins still outscore the evaluation
+WINS = [
+    (7, 7, 4, [(3, 1), (3, 2), (3, 3)], [(3, 0), (6, 6)], (3, 4)),
+    (12, 12, 12, [(0, j) for j in range(11)],
+     [(2, 1), (4, 7), (6, 3), (8, 9), (10, 5), (11, 11), (3, 10), (5, 0), (7, 6), (9, 2), (11, 8)], (0, 11)),
+    (15, 15, 15, [(i, i) for i in range(14)],
+     [(0, 14), (3, 1), (5, 9), (7, 2), (9, 12), (11, 4), (13, 0), (1, 8), (4, 13), (6, 11), (8, 5), (10, 3),
+      (12, 7), (2, 6)], (14, 14)),
+]
+
+
+def cells(cols, placed):
+    """
+    Returns the bitboard of a list of (i, j) cells.
+    """
+    return sum(1 << cols * i + j for i, j in placed)
+
+
+def position(rows, cols, moves):
+    """
+    Returns the (x, o) bitboards after playing moves alternately from X.
+    """
+    x, o = 0, 0
+    for turn, (i, j) in enumerate(moves):
+        if turn % 2 == 0:
+            x |= 1 << cols * i + j
+        else:
+            o |= 1 << cols * i + j
+    return x, o
+
+
+def run(rows, cols, k, moves, depth, processes):
+    """
+    Searches a position to depth on a fresh game.
+    Returns the chosen cell and the SearchStats of the search.
+    """
+    game = mnk.Game(rows, cols, k)
+    game.stats = engine.SearchStats()
+    x, o = position(rows, cols, moves)
+    started = time.perf_counter()
+    cell = parallel.parallel_search(game, x, o, budget=None, depth=depth, processes=processes)
+    game.stats.time = time.perf_counter() - started
+    return cell, game.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay fixed m,n,k positions, serial and parallel, and report search stats.")
+    parser.add_argument("--depth", type=int, default=4, help="fixed search depth")
+    parser.add_argument("--processes", type=int, default=4, help="processes for the parallel search, 1 to skip it")
+    args = parser.parse_args()
+
+    for rows, cols, k, moves in POSITIONS:
+        runs = [("serial", run(rows, cols, k, moves, args.depth, 1))]
+        if args.processes > 1:
+            runs.append((f"{args.processes} processes", run(rows, cols, k, moves, args.depth, args.processes)))
+
+        print(f"{rows}x{cols} k={k} after {len(moves)} moves:")
+        for name, (cell, stats) in runs:
+            print(f"  {name}: move {divmod(cell, cols)}, {stats.nodes} nodes in {stats.time:.3f}s "
+                  f"({stats.nodes / stats.time:.0f} nodes/s)")
+            print(f"    {stats.report()}")
+        if len(runs) > 1:
+            (_, (serial_cell, serial)), (_, (split_cell, split)) = runs
+            if serial_cell != split_cell:
+                print("  moves differ!")
+            else:
+                print(f"  speedup {serial.time / split.time:.2f}x")
+
+    for rows, cols, k, x_cells, o_cells, winning in WINS:
+        game = mnk.Game(rows, cols, k)
+        cell = game.search(cells(cols, x_cells), cells(cols, o_cells), budget=1.0)
+        found = "takes" if divmod(cell, cols) == winning else "misses"
+        print(f"{rows}x{cols} k={k}: {found} the win at {winning}, played {divmod(cell, cols)}")
+
+
+if __name__ == "__main__":
+    main()
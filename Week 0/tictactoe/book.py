@@ -0,0 +1,119 @@
+"""
+Solved table of every Tic Tac Toe position
+
+Build it once with `python book.py`; minimax then answers each move with
+a lookup and only searches when the table has not been built.
+"""
+
+import os
+import struct
+from array import array
+
+import engine
+
+MAGIC = b"TTTBOOK\0"
+FILENAME = "book.bin"
+
+# Not loaded yet, None once loading found no usable table
+UNLOADED = object()
+table = UNLOADED
+
+
+def book_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), FILENAME)
+
+
+def pack(x, o):
+    return x | o << engine.SIZE * engine.SIZE
+
+
+def positions():
+    """
+    Returns every canonical position reachable in play in which
+    the game is not over yet.
+    """
+    found = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in found or engine.won(x) or engine.won(o) or x | o == engine.FULL:
+            continue
+        found.add((x, o))
+        x_to_move = engine.x_to_move(x, o)
+        for cell in range(engine.SIZE * engine.SIZE):
+            bit = 1 << cell
+            if (x | o) & bit:
+                continue
+            if x_to_move:
+                stack.append(engine.canonical(x | bit, o)[:2])
+            else:
+                stack.append(engine.canonical(x, o | bit)[:2])
+    return found
+
+
+def build(path=None):
+    """
+    Solves every reachable position and writes the table: the number of
+    entries, their packed canonical positions in sorted order, then one
+    byte per entry holding the value (plus one) in the high nibble and the
+    best cell, in canonical coordinates, in the low nibble.
+    """
+    keys = array("I")
+    entries = bytearray()
+    for x, o in sorted(positions(), key=lambda position: pack(*position)):
+        value, cell = engine.solve(x, o)
+        keys.append(pack(x, o))
+        entries.append((value + 1) << 4 | cell)
+
+    path = path or book_path()
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<BI", engine.SIZE, len(keys)))
+        f.write(keys.tobytes())
+        f.write(entries)
+    os.replace(temporary, path)
+    return len(keys)
+
+
+def load(path=None):
+    """
+    Reads a table written by build into a dictionary from packed canonical
+    position to entry byte, or returns None if there is no usable table.
+    """
+    path = path or book_path()
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    header = len(MAGIC) + struct.calcsize("<BI")
+    if len(data) < header or data[:len(MAGIC)] != MAGIC:
+        return None
+    size, count = struct.unpack_from("<BI", data, len(MAGIC))
+    keys = array("I")
+    if size != engine.SIZE or len(data) != header + count * (keys.itemsize + 1):
+        return None
+    keys.frombytes(data[header:header + count * keys.itemsize])
+    return dict(zip(keys, data[header + count * keys.itemsize:]))
+
+
+def lookup(x, o):
+    """
+    Returns the best cell for the player to move, or None if the
+    position is not in the table (or there is no table).
+    """
+    global table
+    if table is UNLOADED:
+        table = load()
+    if table is None:
+        return None
+
+    cx, co, symmetry = engine.canonical(x, o)
+    entry = table.get(pack(cx, co))
+    if entry is None:
+        return None
+    return engine.INVERSES[symmetry][entry & 0xF]
+
+
+if __name__ == "__main__":
+    print(f"Solved {build()} positions into {FILENAME}")
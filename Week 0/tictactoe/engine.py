@@ -0,0 +1,202 @@
+"""
+Bitboard Tic Tac Toe engine
+
+A position is two 9-bit integers, one for the cells of each player,
+with bit 3 * i + j standing for cell (i, j).
+"""
+
+X = "X"
+O = "O"
+
+SIZE = 3
+FULL = (1 << SIZE * SIZE) - 1
+
+# Every row, column and diagonal as a mask of its three cells
+WIN_MASKS = tuple(
+    [sum(1 << SIZE * i + j for j in range(SIZE)) for i in range(SIZE)]
+    + [sum(1 << SIZE * i + j for i in range(SIZE)) for j in range(SIZE)]
+    + [sum(1 << SIZE * i + i for i in range(SIZE)),
+       sum(1 << SIZE * i + SIZE - 1 - i for i in range(SIZE))]
+)
+
+# The 8 symmetries of the board (4 rotations, each optionally mirrored),
+# each as the cell every cell moves to
+SYMMETRIES = []
+for mirrored in (False, True):
+    for turns in range(4):
+        permutation = []
+        for cell in range(SIZE * SIZE):
+            i, j = divmod(cell, SIZE)
+            if mirrored:
+                j = SIZE - 1 - j
+            for _ in range(turns):
+                i, j = j, SIZE - 1 - i
+            permutation.append(SIZE * i + j)
+        SYMMETRIES.append(permutation)
+
+# Cell each symmetry moves back from, to undo it
+INVERSES = [[permutation.index(cell) for cell in range(SIZE * SIZE)]
+            for permutation in SYMMETRIES]
+
+# Every symmetry applied to every 9-bit board, so transforming is one lookup
+TRANSFORMS = [
+    [sum(1 << permutation[cell] for cell in range(SIZE * SIZE) if bits >> cell & 1)
+     for bits in range(FULL + 1)]
+    for permutation in SYMMETRIES
+]
+
+# Maps canonical (x, o) positions to their solved (value, best cell)
+transposition = {}
+
+# SearchStats counting the solver's work, None when not wanted
+stats = None
+
+
+class SearchStats():
+    """
+    Counters for the search behind one move, returned alongside the
+    action by minimax when asked for.
+
+    cutoffs counts moves that ended the search of a position early, by
+    ply (for the 3x3 solver, by stones on the board). iterations holds the
+    nodes of each completed iteration of a deepening search.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.cutoffs = {}
+        self.table_hits = 0
+        self.iterations = []
+        self.time = 0.0
+
+    def cutoff(self, ply):
+        self.cutoffs[ply] = self.cutoffs.get(ply, 0) + 1
+
+    def merge(self, other):
+        """
+        Adds the counters of a search done elsewhere, e.g. in a worker process.
+        """
+        self.nodes += other.nodes
+        self.table_hits += other.table_hits
+        for ply, count in other.cutoffs.items():
+            self.cutoffs[ply] = self.cutoffs.get(ply, 0) + count
+
+    def branching_factor(self):
+        """
+        Returns the effective branching factor, how many times more nodes
+        the last iteration searched than the one before, or None if fewer
+        than two iterations finished.
+        """
+        if len(self.iterations) < 2 or not self.iterations[-2]:
+            return None
+        return self.iterations[-1] / self.iterations[-2]
+
+    def report(self):
+        branching = self.branching_factor()
+        return {
+            "nodes": self.nodes,
+            "cutoffs_by_ply": dict(sorted(self.cutoffs.items())),
+            "table_hits": self.table_hits,
+            "depth": len(self.iterations),
+            "branching_factor": None if branching is None else round(branching, 3),
+            "seconds": round(self.time, 6),
+        }
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitboards of a nested list board, with bit
+    n * i + j standing for cell (i, j) of a board n cells wide.
+    """
+    cols = len(board[0])
+    x, o = 0, 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << cols * i + j
+            elif cell == O:
+                o |= 1 << cols * i + j
+    return x, o
+
+
+def won(bits):
+    """
+    Returns True if the cells in bits complete a line.
+    """
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def x_to_move(x, o):
+    return bin(x).count("1") == bin(o).count("1")
+
+
+def canonical(x, o):
+    """
+    Returns the smallest (x, o) among the symmetric images of a position,
+    and the index of the symmetry that produces it.
+    """
+    best = None
+    for symmetry, table in enumerate(TRANSFORMS):
+        image = (table[x], table[o])
+        if best is None or image < best:
+            best, chosen = image, symmetry
+    return best[0], best[1], chosen
+
+
+def solve(x, o):
+    """
+    Returns the minimax value (1 if X wins, -1 if O wins, 0 for a tie)
+    of a position and the best cell for the player to move (None if the
+    game is over).
+
+    Positions are solved once per symmetry class: the table holds the
+    canonical image, and its best cell is mapped back onto this position.
+    """
+    cx, co, symmetry = canonical(x, o)
+    key = (cx, co)
+    if key not in transposition:
+        transposition[key] = search(cx, co)
+    elif stats is not None:
+        stats.table_hits += 1
+    value, cell = transposition[key]
+    return value, None if cell is None else INVERSES[symmetry][cell]
+
+
+def search(x, o):
+    """
+    Returns the (value, best cell) of a position from the solved values of its children.
+    """
+    if stats is not None:
+        stats.nodes += 1
+
+    if won(x):
+        solved = (1, None)
+    elif won(o):
+        solved = (-1, None)
+    elif x | o == FULL:
+        solved = (0, None)
+    else:
+        maximising = x_to_move(x, o)
+        goal = 1 if maximising else -1
+        best, best_cell = None, None
+        for cell in range(SIZE * SIZE):
+            bit = 1 << cell
+            if (x | o) & bit:
+                continue
+            if maximising:
+                value = solve(x | bit, o)[0]
+            else:
+                value = solve(x, o | bit)[0]
+            if best is None or (value > best if maximising else value < best):
+                best, best_cell = value, cell
+                # nothing beats a win, the value is exact either way
+                if best == goal:
+                    if stats is not None:
+                        stats.cutoff(bin(x | o).count("1"))
+                    break
+        solved = (best, best_cell)
+
+    return solved
@@ -0,0 +1,346 @@
+"""
+Search for m,n,k-games: k in a row wins on a board of m rows and n columns
+
+Boards too big to solve outright are searched with iterative deepening
+alpha-beta under a time budget, keeping the move of the deepest search
+that finished.
+"""
+
+import time
+
+import engine
+
+# Seconds a move may take by default
+BUDGET = 1.0
+
+# Least score of won positions, games with long lines score them higher
+# so that wins stay above anything the evaluation can return (see Game.win)
+WIN = 1 << 20
+
+# On boards with more cells than this, only cells within NEIGHBOURHOOD
+# of a stone are searched, far away moves rarely matter
+WIDE = 25
+NEIGHBOURHOOD = 2
+
+# How often (in nodes) the clock is checked
+CLOCK_INTERVAL = 256
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TimeUp(Exception):
+    pass
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+class Game():
+    """
+    Searches one m,n,k-game.
+
+    Positions are bitboards like in the engine, with bit n * i + j standing
+    for cell (i, j), and the search is negamax over (to move, other) pairs.
+    A Game keeps its transposition table and move ordering history between
+    moves, so reuse one for a whole game.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # every k-cell window, and the windows through each cell
+        self.windows = []
+        self.lines = [[] for _ in range(self.cells)]
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if not (0 <= end_i < rows and 0 <= end_j < cols):
+                        continue
+                    cells = [cols * (i + di * step) + j + dj * step for step in range(k)]
+                    mask = sum(1 << cell for cell in cells)
+                    self.windows.append(mask)
+                    for cell in cells:
+                        self.lines[cell].append(mask)
+
+        # cells worth searching once a stone is on each cell
+        self.near = []
+        for cell in range(self.cells):
+            if self.cells <= WIDE:
+                self.near.append(self.full)
+                continue
+            i, j = divmod(cell, cols)
+            self.near.append(sum(
+                1 << cols * a + b
+                for a in range(max(0, i - NEIGHBOURHOOD), min(rows, i + NEIGHBOURHOOD + 1))
+                for b in range(max(0, j - NEIGHBOURHOOD), min(cols, j + NEIGHBOURHOOD + 1))
+            ))
+
+        # windows through a cell break ties in move ordering, central cells first
+        self.centrality = [len(lines) for lines in self.lines]
+
+        # scores of a window holding only one player's stones, by stone count
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        # a window with k stones is a win, so no evaluation reaches this
+        self.win = max(WIN, len(self.windows) * self.weights[k - 1] + 1)
+
+        self.table = {}
+        self.history = [0] * self.cells
+        self.killers = []
+        self.deadline = None
+        self.nodes = 0
+        self.stats = None
+
+    def wins(self, bits, cell):
+        """
+        Returns True if the stone just placed on cell completes a line in bits.
+        """
+        for mask in self.lines[cell]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def evaluate(self, me, them):
+        """
+        Scores a position for the player to move from the windows that
+        only one player has stones in, fuller windows counting for more.
+        """
+        score = 0
+        for mask in self.windows:
+            mine = me & mask
+            theirs = them & mask
+            if mine and not theirs:
+                score += self.weights[popcount(mine)]
+            elif theirs and not mine:
+                score -= self.weights[popcount(theirs)]
+        return score
+
+    def candidates(self, me, them):
+        """
+        Returns the mask of empty cells worth searching.
+        """
+        occupied = me | them
+        if self.cells <= WIDE:
+            return self.full & ~occupied
+        if not occupied:
+            # an empty board has nothing to be near, open in the centre
+            return 1 << self.cols * (self.rows // 2) + self.cols // 2
+        near = 0
+        bits = occupied
+        while bits:
+            low = bits & -bits
+            near |= self.near[low.bit_length() - 1]
+            bits ^= low
+        return near & ~occupied & self.full
+
+    def ordered(self, candidates, best, ply):
+        """
+        Returns the cells of candidates in search order: the transposition
+        table's best move, then this ply's killer moves, then by history.
+        """
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        cells = []
+        while candidates:
+            low = candidates & -candidates
+            cells.append(low.bit_length() - 1)
+            candidates ^= low
+        cells.sort(key=lambda cell: (cell == best, cell in killers,
+                                     self.history[cell], self.centrality[cell]),
+                   reverse=True)
+        return cells
+
+    def root_order(self, me, them, candidates):
+        """
+        Returns the root cells in search order: the best move of the last
+        iteration, then central cells first. Unlike deeper in the tree, the
+        order does not depend on history, so every search of a position
+        breaks ties between equally good moves the same way.
+        """
+        best = self.table_move(me, them)
+        cells = []
+        while candidates:
+            low = candidates & -candidates
+            cells.append(low.bit_length() - 1)
+            candidates ^= low
+        cells.sort(key=lambda cell: (cell == best, self.centrality[cell]), reverse=True)
+        return cells
+
+    def cutoff(self, cell, depth, ply):
+        """
+        Remembers a move that refuted the position, for ordering its siblings.
+        """
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+        killers = self.killers[ply]
+        if killers[0] != cell:
+            killers[1] = killers[0]
+            killers[0] = cell
+        self.history[cell] += depth * depth
+
+    def child(self, me, them, candidates, cell):
+        """
+        Returns the candidates left after the player to move takes cell.
+        """
+        bit = 1 << cell
+        occupied = me | them | bit
+        remaining = (candidates | self.near[cell]) & ~occupied & self.full
+        if not remaining and occupied != self.full:
+            remaining = self.full & ~occupied
+        return remaining
+
+    def negamax(self, me, them, candidates, empties, depth, alpha, beta, ply):
+        """
+        Returns the value of a position for the player to move, searching
+        depth more moves. Wins score self.win plus the cells still empty, so
+        quicker wins score higher.
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CLOCK_INTERVAL == 0:
+            if time.perf_counter() > self.deadline:
+                raise TimeUp()
+
+        if empties == 0:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, them)
+
+        key = (me, them)
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, value, flag, best_move = entry
+            if entry_depth >= depth:
+                if self.stats is not None:
+                    self.stats.table_hits += 1
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        best = None
+        for cell in self.ordered(candidates, best_move, ply):
+            bit = 1 << cell
+            if self.wins(me | bit, cell):
+                value = self.win + empties - 1
+            else:
+                value = -self.negamax(them, me | bit, self.child(me, them, candidates, cell),
+                                      empties - 1, depth - 1, -beta, -alpha, ply + 1)
+            if best is None or value > best:
+                best, best_move = value, cell
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.cutoff(cell, depth, ply)
+                if self.stats is not None:
+                    self.stats.cutoff(ply)
+                break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, best, flag, best_move)
+        return best
+
+    def root(self, me, them, depth):
+        """
+        Searches every move from the root to depth.
+        Returns (value, best cell) for the player to move.
+        """
+        candidates = self.candidates(me, them)
+        empties = self.cells - popcount(me | them)
+        return self.negamax_root(me, them, candidates, empties, depth,
+                                 self.root_order(me, them, candidates))
+
+    def negamax_root(self, me, them, candidates, empties, depth, cells):
+        """
+        Searches the given root cells in order, returning (value, best cell).
+        The best cell is the first of the highest value.
+        """
+        alpha = -2 * self.win
+        best, best_cell = None, None
+        for cell in cells:
+            value = self.root_move(me, them, candidates, empties, depth, cell, alpha)
+            if best is None or value > best:
+                best, best_cell = value, cell
+            if value > alpha:
+                alpha = value
+        self.table[(me, them)] = (depth, best, EXACT, best_cell)
+        return best, best_cell
+
+    def root_move(self, me, them, candidates, empties, depth, cell, alpha):
+        """
+        Returns the value of playing cell from the root, exact if it is above
+        alpha and otherwise only known to be at most alpha.
+        """
+        bit = 1 << cell
+        if self.wins(me | bit, cell):
+            return self.win + empties - 1
+        return -self.negamax(them, me | bit, self.child(me, them, candidates, cell),
+                             empties - 1, depth - 1, -2 * self.win, -alpha, 1)
+
+    def table_move(self, me, them):
+        entry = self.table.get((me, them))
+        return None if entry is None else entry[3]
+
+    def search(self, x, o, budget=BUDGET, depth=None, root=None):
+        """
+        Returns the best cell for the player to move in position (x, o),
+        deepening one move at a time until depth, the end of the game or
+        the time budget (in seconds, None for no limit) is reached.
+
+        The first iteration always finishes, so there is always a move.
+        root replaces Game.root for searching each iteration. Nodes are
+        added to self.stats, if set.
+        """
+        root = root or self.root
+        nodes = self.nodes
+        me, them = (x, o) if engine.x_to_move(x, o) else (o, x)
+        empties = self.cells - popcount(x | o)
+        limit = empties if depth is None else min(depth, empties)
+        started = time.perf_counter()
+
+        cell = None
+        for iteration in range(1, limit + 1):
+            self.deadline = None if budget is None or cell is None else started + budget
+            iteration_nodes = self.nodes
+            try:
+                value, cell = root(me, them, iteration)
+            except TimeUp:
+                break
+            finally:
+                self.deadline = None
+            if self.stats is not None:
+                self.stats.iterations.append(self.nodes - iteration_nodes)
+            # a forced result will not change with more depth
+            if abs(value) >= self.win:
+                break
+
+        if self.stats is not None:
+            self.stats.nodes += self.nodes - nodes
+        return cell
+
+
+# Games by (rows, cols, k), so their tables last across moves
+games = {}
+
+
+def game(rows, cols, k):
+    key = (rows, cols, k)
+    if key not in games:
+        games[key] = Game(rows, cols, k)
+    return games[key]
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+
+import engine
+import mnk
+
+# Game the worker processes search, set in the parent just before the pool is
+# forked so every worker starts from the parent's transposition table
+shared_game = None
+
+# Best exact root value found so far by any worker, in shared memory
+shared_alpha = None
+
+
+def search_cell(task):
+    """
+    Worker task: searches one root move against the best value any worker
+    has found so far. Returns the cell, its value (None if time ran out),
+    the nodes searched and the task's SearchStats (None if not wanted).
+    """
+    me, them, candidates, empties, depth, cell, deadline = task
+    game = shared_game
+    nodes = game.nodes
+    if game.stats is not None:
+        game.stats = engine.SearchStats()
+
+    # searching against alpha - 1 keeps values equal to alpha exact, so ties
+    # are broken by root order just like in the serial search
+    game.deadline = deadline
+    try:
+        value = game.root_move(me, them, candidates, empties, depth, cell, shared_alpha.value - 1)
+    except mnk.TimeUp:
+        return cell, None, game.nodes - nodes, game.stats
+    finally:
+        game.deadline = None
+
+    with shared_alpha.get_lock():
+        if value > shared_alpha.value:
+            shared_alpha.value = value
+    return cell, value, game.nodes - nodes, game.stats
+
+
+def split_root(pool, game, me, them, depth):
+    """
+    Searches the root moves of a position to depth across the pool.
+    Returns (value, best cell) as Game.root would: the moves are handed out
+    in the serial search order and the first of the highest value wins.
+
+    Within one search a position is only ever searched to one depth, so on
+    a fresh game the values do not depend on which worker searched what.
+    Tables kept from earlier moves hold deeper entries, which can make
+    either search see a slightly different value.
+    """
+    candidates = game.candidates(me, them)
+    empties = game.cells - mnk.popcount(me | them)
+    cells = game.root_order(me, them, candidates)
+
+    shared_alpha.value = -2 * game.win
+    tasks = [(me, them, candidates, empties, depth, cell, game.deadline) for cell in cells]
+
+    best, best_cell = None, None
+    for cell, value, nodes, stats in pool.imap(search_cell, tasks):
+        game.nodes += nodes
+        if stats is not None:
+            game.stats.merge(stats)
+        if value is None:
+            raise mnk.TimeUp()
+        if best is None or value > best:
+            best, best_cell = value, cell
+    game.table[(me, them)] = (depth, best, mnk.EXACT, best_cell)
+    return best, best_cell
+
+
+def parallel_search(game, x, o, budget=mnk.BUDGET, depth=None, processes=None):
+    """
+    Game.search with the root moves of every iteration split across a pool
+    of forked workers, which share the best value found so far to prune.
+
+    Without fork (e.g. on Windows) the position is searched in this process.
+    """
+    global shared_game, shared_alpha
+
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return game.search(x, o, budget, depth)
+
+    context = multiprocessing.get_context("fork")
+    shared_game = game
+    shared_alpha = context.Value("q", -2 * game.win)
+    with context.Pool(processes) as pool:
+        return game.search(x, o, budget, depth,
+                           root=lambda me, them, depth: split_root(pool, game, me, them, depth))
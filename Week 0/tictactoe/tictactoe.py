@@ -2,21 +2,23 @@
 Tic Tac Toe Player
 """
 
-import math
-from copy import deepcopy
+import time
+
+import book
+import engine
+import mnk
+import parallel
 
 X = "X"
 O = "O"
 EMPTY = None
 
 
-def initial_state():
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
 
 
 def player(board):
@@ -58,7 +60,8 @@ def result(board, action):
     Returns the board that results from making move (i, j) on the board.
     """
 
-    result_board = deepcopy(board)
+    # rows only hold strings, copying each row is enough
+    result_board = [row[:] for row in board]
 
     input = player(result_board)
     result_board[action[0]][action[1]] = input
@@ -66,65 +69,46 @@ def result(board, action):
     return result_board
 
 
-def winner(board):
+def line_length(board, k=None):
+    """
+    Returns how many in a row win on the board, the shorter side unless k is given.
+    """
+    return k or min(len(board), len(board[0]))
+
+
+def winner(board, k=None):
     """
     Returns the winner of the game, if there is one.
     """
-    
-    # check horizontal
-    for row in board:
-        winner = row[0]
 
-        for cell in row:
-            # if the cell is occupied by a different player, no winner, stop checking this row
-            if cell != winner:
-                winner = None
-                break
-        
-        if winner:
-            # return the winner if there is one
-            return winner
-    
-    # check vertical
-    for j in range(len(board)):
-        winner = board[0][j]
-
-        for i in range(len(board)):
-            if board[i][j] != winner:
-                winner = None
-                break
-        
-        if winner:
-            return winner
-    
-    # check diagonals
-    winner = board[0][0]
+    k = line_length(board, k)
+    rows, cols = len(board), len(board[0])
 
-    for i in range(len(board)):
-        if board[i][i] != winner:
-            winner = None
-            break
+    # check the k cells going right, down and down either diagonal from every stone
+    for i in range(rows):
+        for j in range(cols):
+            winner = board[i][j]
+            if winner == EMPTY:
+                continue
 
-    if winner:
-        return winner
-        
-    winner = board[0][2]
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                # skip lines that would run off the board
+                if not (0 <= i + di * (k - 1) < rows and 0 <= j + dj * (k - 1) < cols):
+                    continue
 
-    for i in range(len(board)):
-        if board[i][-i - 1] != winner:
-            winner = None
-            break
-    
-    # final return, whether there is a winner or None
-    return winner
+                if all(board[i + di * step][j + dj * step] == winner for step in range(1, k)):
+                    return winner
+
+    # final return, no line of k found
+    return None
 
 
-def terminal(board):
+def terminal(board, k=None):
     """
     Returns True if game is over, False otherwise.
     """
 
-    if winner(board):
+    if winner(board, k):
         return True
     
     # check if board is filled
@@ -137,12 +121,12 @@ def terminal(board):
     return True
 
 
-def utility(board):
+def utility(board, k=None):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
     
-    win = winner(board)
+    win = winner(board, k)
 
     if win == X:
         return 1
@@ -154,90 +138,59 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, k=None, budget=mnk.BUDGET, processes=1, stats=False):
     """
     Returns the optimal action for the current player on the board.
-    """
-    
-    # when game is over already
-    if terminal(board):
-        return None
-
-    # get the current player
-    play = player(board)
-
-    # find the optimal action based on player goal
-    if play == X:
-        optimal_action = max_value(board, 1)[1]
-    else:
-        optimal_action = min_value(board, -1)[1]
-
-    return optimal_action    
 
+    Boards other than the classic 3x3 are searched within budget seconds
+    (None for no limit), so the action is the best found in that time,
+    splitting the moves across processes when there is more than one.
 
-def max_value(board, current_min):
-    """
-    Returns the value and action that maximises outcome given opponent's minimising strategy
+    With stats, returns (action, engine.SearchStats) instead.
     """
 
-    # base case
-    if terminal(board):
-        return utility(board), None
-    
-    # assume maximum utility value is the absolute minimum possible
-    max = -1
-    first = True
-
-    # find the largest possible value from all minimum values
-    for action in actions(board):
-        # initialise the action to be returned 
-        if first:
-            first = False
-            optimal_action = action
-
-        min = min_value(result(board, action), max)[0]
-        
-        if min > max:
-            max = min
-
-            # alpha-beta pruning (or stop if reached maximum utility) to reduce time complexity
-            if max > current_min or max == 1:
-                return max, action
-            
-            optimal_action = action
-    
-    return max, optimal_action
+    search_stats = engine.SearchStats() if stats else None
+    started = time.perf_counter()
+    action = search(board, k, budget, processes, search_stats)
+
+    if search_stats is None:
+        return action
+    search_stats.time = time.perf_counter() - started
+    return action, search_stats
 
 
-def min_value(board, current_max):
+def search(board, k, budget, processes, search_stats):
     """
-    Returns the value and action that minimises outcome given opponent's maximising strategy
+    Returns the optimal action for minimax, counting the work in search_stats if given.
     """
 
-    # base case
-    if terminal(board):
-        return utility(board), None
-    
-    # assume minimum utility value is the absolute maximum possible
-    min = 1
-    first = True
-
-    # find the smallest possible value from all maximum values
-    for action in actions(board):
-        # initialise the action to be returned 
-        if first:
-            first = False
-            optimal_action = action
-        
-        max = max_value(result(board, action), min)[0]
-        
-        if max < min:
-            min = max
-
-            # alpha-beta pruning (or stop if reached minimum utility) to reduce time complexity
-            if min < current_max or min == -1:
-                return min, action
-
-            optimal_action = action
-    
-    return min, optimal_action
+    # when game is over already
+    if terminal(board, k):
+        return None
+
+    k = line_length(board, k)
+    rows, cols = len(board), len(board[0])
+    if (rows, cols, k) != (engine.SIZE, engine.SIZE, engine.SIZE):
+        x, o = engine.encode(board)
+        game = mnk.game(rows, cols, k)
+        game.stats = search_stats
+        try:
+            cell = parallel.parallel_search(game, x, o, budget, processes=processes)
+        finally:
+            game.stats = None
+        return divmod(cell, cols)
+
+    # look the move up in the solved table (see book.py), and fall back to
+    # solving the position with the bitboard engine if it has not been built
+    x, o = engine.encode(board)
+    cell = book.lookup(x, o)
+    if cell is None:
+        engine.stats = search_stats
+        try:
+            cell = engine.solve(x, o)[1]
+        finally:
+            engine.stats = None
+    elif search_stats is not None:
+        search_stats.table_hits += 1
+
+    return divmod(cell, engine.SIZE)
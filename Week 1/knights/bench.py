@@ -0,0 +1,82 @@
+import argparse
+import random
+import time
+
+from logic import And, Biconditional, Not, Or, Symbol, model_check, truth_table_check
+from models import parallel_check, pruned_check
+
+
+def generate(symbols, rng):
+    """Returns a knights and knaves knowledge base over the given number
+    of symbols, and the knight symbol of every character as queries.
+
+    Every character is a knight or a knave and says something about one to
+    three others. With an odd number of symbols the last character has no
+    knave symbol, being a knave is just not being a knight.
+    """
+    people = (symbols + 1) // 2
+    knights = [Symbol(f"{i} is a Knight") for i in range(people)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(symbols // 2)]
+    if len(knaves) < people:
+        knaves.append(Not(knights[-1]))
+
+    knowledge = And()
+    for i in range(people):
+        knowledge.add(Or(knights[i], knaves[i]))
+        knowledge.add(Not(And(knights[i], knaves[i])))
+
+    for i in range(people):
+        claims = []
+        for j in rng.sample(range(people), min(people, rng.randint(1, 3))):
+            claims.append(knights[j] if rng.random() < 0.5 else knaves[j])
+        statement = rng.choice([And, Or])(*claims)
+        if rng.random() < 0.3:
+            statement = Not(statement)
+
+        # a knight's statement is true, a knave's is false
+        knowledge.add(Biconditional(knights[i], statement))
+
+    return knowledge, knights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare entailment engines on generated knights and knaves puzzles.")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[15, 20, 25, 30, 35])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--table-limit", type=int, default=24,
+                        help="largest puzzle, in symbols, to enumerate the full truth table of")
+    args = parser.parse_args()
+
+    # the pruned searches skip simplification, which would leave them too
+    # few symbols to branch on, let alone split across processes
+    engines = [
+        ("sat", model_check),
+        ("truth table", truth_table_check),
+        ("pruned", lambda knowledge, query: pruned_check(knowledge, query, simplified=False)),
+        (f"pruned, {args.processes} processes",
+         lambda knowledge, query: parallel_check(knowledge, query, args.processes, simplified=False)),
+        ("pruned, simplified", pruned_check),
+    ]
+
+    for symbols in args.symbols:
+        knowledge, queries = generate(symbols, random.Random(args.seed + symbols))
+        print(f"{symbols} symbols, {len(knowledge.conjuncts)} sentences, {len(queries)} queries:")
+
+        expected = None
+        for name, check in engines:
+            if name == "truth table" and symbols > args.table_limit:
+                print(f"  {name}: skipped")
+                continue
+            started = time.perf_counter()
+            answers = [check(knowledge, query) for query in queries]
+            elapsed = time.perf_counter() - started
+            print(f"  {name}: {elapsed:.3f}s, {sum(answers)} entailed")
+            if expected is None:
+                expected = answers
+            elif answers != expected:
+                print(f"  {name} disagrees with {engines[0][0]}!")
+
+
+if __name__ == "__main__":
+    main()
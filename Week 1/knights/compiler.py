@@ -0,0 +1,128 @@
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Symbols whose assignments are evaluated side by side, as the bits of one int
+SLICE = 16
+
+
+def compile_sentence(sentence, symbols):
+    """Compiles sentence into a function of (values, full).
+
+    values[i] holds the truth of symbols[i] in each of a batch of models,
+    one bit per model, and full has a bit set for every model. The function
+    returns the bits of the models in which sentence is true. With full = 1
+    it evaluates a single model given as 0/1 values.
+    """
+    index = {name: i for i, name in enumerate(symbols)}
+    lines = []
+    names = {}
+
+    def emit(sentence):
+        """Returns the name holding the bits of sentence, emitting the lines computing it."""
+        if isinstance(sentence, Symbol):
+            return f"values[{index[sentence.name]}]"
+        if sentence in names:
+            return names[sentence]
+
+        if isinstance(sentence, Not):
+            expression = f"full ^ {emit(sentence.operand)}"
+        elif isinstance(sentence, And):
+            operands = [emit(conjunct) for conjunct in sentence.conjuncts]
+            expression = " & ".join(operands) if operands else "full"
+        elif isinstance(sentence, Or):
+            operands = [emit(disjunct) for disjunct in sentence.disjuncts]
+            expression = " | ".join(operands) if operands else "0"
+        elif isinstance(sentence, Implication):
+            expression = f"(full ^ {emit(sentence.antecedent)}) | {emit(sentence.consequent)}"
+        elif isinstance(sentence, Biconditional):
+            expression = f"full ^ {emit(sentence.left)} ^ {emit(sentence.right)}"
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        # every subsentence is computed once, however often it appears
+        name = f"t{len(names)}"
+        names[sentence] = name
+        lines.append(f"    {name} = {expression}")
+        return name
+
+    result = emit(sentence)
+    source = "\n".join(["def evaluate(values, full):", *lines, f"    return {result}"])
+    namespace = {}
+    exec(compile(source, "<sentence>", "exec"), namespace)
+    return namespace["evaluate"]
+
+
+def compile_partial(sentence, symbols):
+    """Compiles sentence into a function of (trues, falses, full) for partial models.
+
+    trues[i] and falses[i] hold the models (bits, as for compile_sentence)
+    in which symbols[i] is known to be true or false, it is unknown in the
+    rest. The function returns the bits of the models in which sentence is
+    known to be true and those in which it is known to be false, by
+    three-valued (Kleene) logic: unknown only where the unknown symbols
+    could still make it either.
+    """
+    index = {name: i for i, name in enumerate(symbols)}
+    lines = []
+    names = {}
+
+    def emit(sentence):
+        """Returns the names holding the known true and known false bits of sentence."""
+        if isinstance(sentence, Symbol):
+            i = index[sentence.name]
+            return f"trues[{i}]", f"falses[{i}]"
+        if isinstance(sentence, Not):
+            known_true, known_false = emit(sentence.operand)
+            return known_false, known_true
+        if sentence in names:
+            return names[sentence]
+
+        if isinstance(sentence, And):
+            operands = [emit(conjunct) for conjunct in sentence.conjuncts]
+            known_true = " & ".join(known_true for known_true, _ in operands) or "full"
+            known_false = " | ".join(known_false for _, known_false in operands) or "0"
+        elif isinstance(sentence, Or):
+            operands = [emit(disjunct) for disjunct in sentence.disjuncts]
+            known_true = " | ".join(known_true for known_true, _ in operands) or "0"
+            known_false = " & ".join(known_false for _, known_false in operands) or "full"
+        elif isinstance(sentence, Implication):
+            antecedent_true, antecedent_false = emit(sentence.antecedent)
+            consequent_true, consequent_false = emit(sentence.consequent)
+            known_true = f"{antecedent_false} | {consequent_true}"
+            known_false = f"{antecedent_true} & {consequent_false}"
+        elif isinstance(sentence, Biconditional):
+            left_true, left_false = emit(sentence.left)
+            right_true, right_false = emit(sentence.right)
+            known_true = f"({left_true} & {right_true}) | ({left_false} & {right_false})"
+            known_false = f"({left_true} & {right_false}) | ({left_false} & {right_true})"
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        pair = f"t{len(names)}", f"f{len(names)}"
+        names[sentence] = pair
+        lines.append(f"    {pair[0]} = {known_true}")
+        lines.append(f"    {pair[1]} = {known_false}")
+        return pair
+
+    known_true, known_false = emit(sentence)
+    source = "\n".join(["def evaluate(trues, falses, full):", *lines,
+                        f"    return {known_true}, {known_false}"])
+    namespace = {}
+    exec(compile(source, "<sentence>", "exec"), namespace)
+    return namespace["evaluate"]
+
+
+def slice_masks(count):
+    """Returns the bits of symbols 0 to count - 1 in the 2 ** count models
+    of a slice, where model m assigns symbol i the value of bit i of m."""
+    size = 1 << count
+    masks = []
+    for i in range(count):
+        # a run of 2 ** i false models then 2 ** i true ones, repeated
+        width = 1 << i
+        mask = ((1 << width) - 1) << width
+        length = width * 2
+        while length < size:
+            mask |= mask << length
+            length *= 2
+        masks.append(mask)
+    return masks, (1 << size) - 1
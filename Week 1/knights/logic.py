@@ -1,7 +1,53 @@
 import itertools
+import weakref
 
 
-class Sentence():
+# Sentences built so far, by class and operands, so that structurally equal
+# sentences are one object (while anything still refers to them)
+interned = weakref.WeakValueDictionary()
+
+
+def shared(sentence):
+    """Returns the interned sentence structurally equal to sentence."""
+    if not isinstance(sentence, And) or sentence.frozen:
+        return sentence
+    key = (And, tuple(sentence.conjuncts))
+    snapshot = interned.get(key)
+    if snapshot is None:
+        snapshot = type.__call__(And, *sentence.conjuncts)
+        snapshot.frozen = True
+        interned[key] = snapshot
+    return snapshot
+
+
+class Interned(type):
+    """Metaclass building each structurally distinct sentence only once.
+
+    Calling a sentence class with the same operands as before returns the
+    sentence built then, so equal sentences compare (and hash) by identity.
+    And is the exception, since add changes it: every And call builds a new
+    one, and an And used inside another sentence is replaced by a shared
+    snapshot of its conjuncts so far.
+    """
+
+    def __call__(cls, *operands):
+        operands = tuple(shared(operand) for operand in operands)
+        if cls is And:
+            return super().__call__(*operands)
+
+        key = (cls, operands)
+        try:
+            sentence = interned.get(key)
+        except TypeError:
+            # unhashable operands are not sentences, the constructor rejects them
+            return super().__call__(*operands)
+        if sentence is None:
+            sentence = super().__call__(*operands)
+            interned[key] = sentence
+        return sentence
+
+
+class Sentence(metaclass=Interned):
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -12,8 +58,16 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return frozenset()
+
+    def arguments(self):
+        """Returns the arguments the sentence was built from."""
+        return ()
+
+    def __reduce__(self):
+        # rebuild through the constructor, so unpickled sentences are interned too
+        return type(self), self.arguments()
 
     @classmethod
     def validate(cls, sentence):
@@ -46,12 +100,7 @@ class Symbol(Sentence):
 
     def __init__(self, name):
         self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+        self._symbols = frozenset([name])
 
     def __repr__(self):
         return self.name
@@ -66,7 +115,10 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return self._symbols
+
+    def arguments(self):
+        return (self.name,)
 
 
 class Not(Sentence):
@@ -74,12 +126,6 @@ class Not(Sentence):
         Sentence.validate(operand)
         self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
-
     def __repr__(self):
         return f"Not({self.operand})"
 
@@ -92,20 +138,29 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def arguments(self):
+        return (self.operand,)
+
 
 class And(Sentence):
+
+    # Only the snapshots shared inside other sentences are frozen
+    frozen = False
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
+        self._hash = None
+        self._symbols = None
 
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash(("and", tuple(self.conjuncts)))
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +169,12 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.frozen:
+            raise TypeError("cannot add to an And shared inside other sentences")
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        self.conjuncts.append(shared(conjunct))
+        self._hash = None
+        self._symbols = None
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -127,7 +186,12 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        if self._symbols is None:
+            self._symbols = frozenset().union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return self._symbols
+
+    def arguments(self):
+        return tuple(self.conjuncts)
 
 
 class Or(Sentence):
@@ -135,14 +199,7 @@ class Or(Sentence):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        self._symbols = frozenset().union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -158,7 +215,10 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return self._symbols
+
+    def arguments(self):
+        return tuple(self.disjuncts)
 
 
 class Implication(Sentence):
@@ -167,14 +227,7 @@ class Implication(Sentence):
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        self._symbols = antecedent.symbols() | consequent.symbols()
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -189,7 +242,10 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self._symbols
+
+    def arguments(self):
+        return (self.antecedent, self.consequent)
 
 
 class Biconditional(Sentence):
@@ -198,14 +254,7 @@ class Biconditional(Sentence):
         Sentence.validate(right)
         self.left = left
         self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        self._symbols = left.symbols() | right.symbols()
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -222,42 +271,118 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return self._symbols
+
+    def arguments(self):
+        return (self.left, self.right)
+
+
+class KnowledgeBase():
+    """Sentences known to be true, for asking many entailment queries.
+
+    Every sentence is encoded once into a SAT solver that is kept between
+    queries, guarded by a selector variable: the sentence only constrains
+    a query while its selector is assumed true, so retracting a sentence
+    just stops assuming it.
+    """
+
+    def __init__(self, *sentences):
+        # imported here as sat.py builds on the classes above
+        from sat import Encoder
+        self.encoder = Encoder()
+        self.solver = self.encoder.solver
+        self.selectors = {}
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        sentence = shared(sentence)
+        if sentence in self.selectors:
+            return
+        selector = self.solver.new_variable()
+        self.solver.add_clause([-selector, self.encoder.literal(sentence)])
+        self.selectors[sentence] = selector
+
+    def retract(self, sentence):
+        """Removes a sentence added before, raising KeyError if there is none."""
+        selector = self.selectors.pop(shared(sentence))
+
+        # the selector is never assumed again, fixing it false for good
+        # lets the solver drop the sentence's clause
+        self.solver.add_clause([-selector])
+
+    def sentences(self):
+        """Returns the sentences in the knowledge base."""
+        return list(self.selectors)
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        return self.entailed([query]) == [query]
+
+    def entailed(self, queries):
+        """Returns the queries the knowledge base entails, in order.
+
+        Any model of the knowledge base that the solver finds on the way
+        rules out every query false in it, so most queries that are not
+        entailed never need a search of their own.
+        """
+        literals = [self.encoder.literal(query) for query in queries]
+        assumptions = list(self.selectors.values())
+
+        def holds(literal, model):
+            return model[abs(literal)] == (literal > 0)
+
+        # an inconsistent knowledge base entails everything
+        if not self.solver.solve(assumptions):
+            return list(queries)
+
+        undecided = [i for i, literal in enumerate(literals)
+                     if holds(literal, self.solver.model)]
+        entailed = set()
+        while undecided:
+            i = undecided.pop(0)
+            if self.solver.solve(assumptions + [-literals[i]]):
+                model = self.solver.model
+                undecided = [j for j in undecided if holds(literals[j], model)]
+            else:
+                entailed.add(i)
+        return [query for i, query in enumerate(queries) if i in entailed]
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
+    # simplified, then decided with a SAT solver; imported here as both
+    # modules build on the classes above
+    from sat import entails
+    from simplify import prepare
+    return entails(*prepare(knowledge, query))
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+def truth_table_check(knowledge, query):
+    """Checks if knowledge base entails query by enumerating every model."""
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+    # compiled to bit operations that evaluate many models at once, see compiler.py
+    from compiler import SLICE, compile_sentence, slice_masks
+    from simplify import prepare
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    # Drop the symbols the knowledge base fixes, see simplify.py
+    knowledge, query = prepare(knowledge, query)
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(knowledge.symbols() | query.symbols())
+
+    # Models where the knowledge base is true but the query is not
+    counterexamples = compile_sentence(And(knowledge, Not(query)), symbols)
+
+    # The first symbols take every combination within a slice of models,
+    # the rest are the bits of an int, fixed for the whole slice
+    sliced = min(len(symbols), SLICE)
+    masks, full = slice_masks(sliced)
+    for rest in range(1 << (len(symbols) - sliced)):
+        values = masks + [full if rest >> i & 1 else 0 for i in range(len(symbols) - sliced)]
+        if counterexamples(values, full):
+            return False
+    return True
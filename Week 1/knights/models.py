@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+
+from compiler import SLICE, compile_partial, compile_sentence, slice_masks
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+from simplify import prepare
+
+# Search the worker processes run, set in the parent just before the pool is
+# forked, as the compiled evaluators cannot be pickled
+shared_search = None
+
+
+def symbol_order(sentence):
+    """Returns the symbols of sentence in the order they first appear,
+    so that symbols constrained together are assigned together."""
+    order = {}
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, Symbol):
+            order.setdefault(sentence.name, len(order))
+        elif isinstance(sentence, Not):
+            stack.append(sentence.operand)
+        elif isinstance(sentence, (And, Or)):
+            operands = sentence.conjuncts if isinstance(sentence, And) else sentence.disjuncts
+            stack.extend(reversed(operands))
+        elif isinstance(sentence, Implication):
+            stack.extend([sentence.consequent, sentence.antecedent])
+        elif isinstance(sentence, Biconditional):
+            stack.extend([sentence.right, sentence.left])
+    return list(order)
+
+
+class ModelSearch():
+    """Depth-first search for a model of the knowledge base in which the
+    query is false, assigning one symbol at a time.
+
+    Each partial model is evaluated in three-valued logic, so a subtree is
+    skipped as soon as the knowledge base is known false (or the query known
+    true) in it. The last SLICE symbols are never branched on, the models
+    they complete are checked all at once with a bit-sliced evaluator.
+
+    With simplified set the symbols the knowledge base fixes are first
+    substituted away (see simplify.prepare), leaving fewer to branch on.
+    """
+
+    def __init__(self, knowledge, query, simplified=True):
+        if simplified:
+            knowledge, query = prepare(knowledge, query)
+        counterexample = And(knowledge, Not(query))
+        self.symbols = symbol_order(counterexample)
+        self.partial = compile_partial(counterexample, self.symbols)
+        self.complete = compile_sentence(counterexample, self.symbols)
+        self.sliced = min(len(self.symbols), SLICE)
+        self.masks, self.full = slice_masks(self.sliced)
+        self.branched = len(self.symbols) - self.sliced
+
+    def search(self, trues, falses, depth):
+        """Returns True if some model extending the assignment of the first
+        depth symbols (trues[i] or falses[i] set for each) is a counterexample."""
+        known_true, known_false = self.partial(trues, falses, 1)
+        if known_false:
+            return False
+        if known_true:
+            return True
+
+        if depth == self.branched:
+            values = [self.full if trues[i] else 0 for i in range(depth)] + self.masks
+            return bool(self.complete(values, self.full))
+
+        for value in (1, 0):
+            trues[depth], falses[depth] = value, 1 - value
+            if self.search(trues, falses, depth + 1):
+                return True
+        trues[depth] = falses[depth] = 0
+        return False
+
+    def search_prefix(self, prefix, depth):
+        """Searches below the assignment of the first depth symbols given by
+        the bits of prefix, bit i set meaning symbol i is true."""
+        trues = [prefix >> i & 1 if i < depth else 0 for i in range(len(self.symbols))]
+        falses = [1 - trues[i] if i < depth else 0 for i in range(len(self.symbols))]
+        return self.search(trues, falses, depth)
+
+
+def search_prefix(task):
+    """Worker task: searches one assignment of the top symbols."""
+    prefix, depth = task
+    return shared_search.search_prefix(prefix, depth)
+
+
+def pruned_check(knowledge, query, simplified=True):
+    """Checks if knowledge base entails query, answering exactly like
+    truth_table_check but skipping partial models that cannot matter."""
+    return not ModelSearch(knowledge, query, simplified).search_prefix(0, 0)
+
+
+def parallel_check(knowledge, query, processes=None, simplified=True):
+    """Checks if knowledge base entails query like pruned_check, with the
+    assignments of the top symbols split across a pool of forked workers.
+
+    Without fork (e.g. on Windows) the search runs in this process.
+    """
+    global shared_search
+
+    search = ModelSearch(knowledge, query, simplified)
+    processes = processes or os.cpu_count() or 1
+
+    # enough tasks to keep every worker busy while some finish early
+    split = min(search.branched, (processes * 4 - 1).bit_length())
+    if processes <= 1 or split == 0 or "fork" not in multiprocessing.get_all_start_methods():
+        return not search.search_prefix(0, 0)
+
+    shared_search = search
+    tasks = [(prefix, split) for prefix in range(1 << split)]
+    with multiprocessing.get_context("fork").Pool(processes) as pool:
+        for found in pool.imap_unordered(search_prefix, tasks):
+            if found:
+                return False
+    return True
@@ -0,0 +1,335 @@
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Activities are rescaled once any grows past this
+RESCALE = 1e100
+
+# Each conflict makes later bumps count for this much more
+DECAY = 1 / 0.95
+
+
+class Solver():
+    """CDCL SAT solver over DIMACS-style integer literals.
+
+    Variables are numbered from 1, a literal is a variable or its negation.
+    Clauses are watched by their first two literals, conflicts are analysed
+    to their first unique implication point, and decisions pick the
+    variable most involved in recent conflicts.
+    """
+
+    def __init__(self):
+        self.variables = 0
+        self.value = {}
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.heap = []
+        self.bump = 1.0
+        self.watches = {}
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        self.ok = True
+        self.model = None
+
+    def new_variable(self):
+        """Returns a fresh variable."""
+        self.variables += 1
+        variable = self.variables
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        heapq.heappush(self.heap, (0.0, variable))
+        return variable
+
+    def add_clause(self, literals):
+        """Adds a clause, returning False if the clauses became unsatisfiable."""
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+
+        clause = []
+        for literal in literals:
+            value = self.value.get(literal)
+            if value is True or -literal in clause:
+                # satisfied already, or a tautology
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.value[literal] = True
+        self.value[-literal] = False
+        self.level[variable] = len(self.trail_lim)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def cancel_until(self, level):
+        """Undoes every assignment made above a decision level."""
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            del self.value[literal]
+            del self.value[-literal]
+            self.reason[variable] = None
+            self.phase[variable] = literal > 0
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+
+    def propagate(self):
+        """Assigns every literal implied by a unit clause.
+
+        Returns a clause with every literal false, or None if there is no conflict.
+        """
+        value = self.value
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+
+            watchers = self.watches[false_literal]
+            self.watches[false_literal] = kept = []
+            for i, clause in enumerate(watchers):
+                # keep the false literal second, so clause[0] is the other watch
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                other = clause[0]
+                if value.get(other) is True:
+                    kept.append(clause)
+                    continue
+
+                # look for another literal that is not false to watch instead
+                for k in range(2, len(clause)):
+                    if value.get(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value.get(other) is False:
+                        kept.extend(watchers[i + 1:])
+                        self.head = len(self.trail)
+                        return clause
+                    self.assign(other, clause)
+        return None
+
+    def analyse(self, conflict):
+        """Learns a clause from a conflict.
+
+        Returns the clause, asserting literal first, and the level to backjump to.
+        """
+        level = len(self.trail_lim)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        clause = conflict
+        index = len(self.trail) - 1
+
+        while True:
+            # the reason of an implied literal holds it first, skip it
+            for other in clause[0 if literal is None else 1:]:
+                variable = abs(other)
+                if variable in seen or self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump_activity(variable)
+                if self.level[variable] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+
+            # walk back along the trail to the next literal in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+
+        learnt[0] = -literal
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # watch the literal of the highest level after the asserting one
+        deepest = max(range(1, len(learnt)), key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump_activity(self, variable):
+        self.activity[variable] += self.bump
+        if self.activity[variable] > RESCALE:
+            self.activity = [activity / RESCALE for activity in self.activity]
+            self.bump /= RESCALE
+            self.heap = [(-self.activity[v], v) for v in range(1, self.variables + 1)
+                         if self.value.get(v) is None]
+            heapq.heapify(self.heap)
+        elif self.value.get(variable) is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def decide(self):
+        """Returns the unassigned variable of highest activity, or None if all are assigned."""
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if self.value.get(variable) is None and -activity == self.activity[variable]:
+                return variable
+        for variable in range(1, self.variables + 1):
+            if self.value.get(variable) is None:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """Returns True if the clauses are satisfiable with every assumed
+        literal true, leaving a satisfying assignment (variable -> bool) in
+        self.model.
+
+        Assumptions only hold for this call, while clauses learnt from them
+        follow from the clauses alone and are kept for later calls.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyse(conflict)
+                self.cancel_until(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.watch(learnt)
+                    self.assign(learnt[0], learnt)
+                self.bump *= DECAY
+                continue
+
+            # the assumptions are the first decisions, retaken after any backjump
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value.get(literal)
+                if value is False:
+                    self.cancel_until(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                self.model = {v: self.value[v] for v in range(1, self.variables + 1)}
+                self.cancel_until(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self.assign(variable if self.phase[variable] else -variable, None)
+
+
+class Encoder():
+    """Tseitin transform of sentences into a Solver's clauses.
+
+    Every subsentence gets a literal equivalent to it, so the clauses grow
+    linearly with the sentences. Symbols map to variables by name.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = solver or Solver()
+        self.variables = {}
+        self.literals = {}
+        self.true = None
+
+    def variable(self, name):
+        """Returns the variable of the symbol called name."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def constant(self, value):
+        """Returns a literal that is always value."""
+        if self.true is None:
+            self.true = self.solver.new_variable()
+            self.solver.add_clause([self.true])
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to sentence, adding the clauses defining it."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            operands = sentence.conjuncts if isinstance(sentence, And) else sentence.disjuncts
+            if not operands:
+                return self.constant(isinstance(sentence, And))
+            parts = [self.literal(operand) for operand in operands]
+            if len(parts) == 1:
+                return parts[0]
+
+            # an Or is the negation of the And of its negated operands
+            sign = 1 if isinstance(sentence, And) else -1
+            parts = [sign * part for part in parts]
+            result = self.solver.new_variable()
+            for part in parts:
+                add([-result, part])
+            add([result] + [-part for part in parts])
+            result *= sign
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            result = self.solver.new_variable()
+            add([-result, -antecedent, consequent])
+            add([result, antecedent])
+            add([result, -consequent])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            result = self.solver.new_variable()
+            add([-result, -left, right])
+            add([-result, left, -right])
+            add([result, left, right])
+            add([result, -left, -right])
+        else:
+            raise TypeError(f"cannot encode {type(sentence).__name__}")
+
+        self.literals[sentence] = result
+        return result
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query, by showing that the
+    knowledge base and the negated query cannot both be true."""
+    encoder = Encoder()
+    encoder.solver.add_clause([encoder.literal(knowledge)])
+    encoder.solver.add_clause([-encoder.literal(query)])
+    return not encoder.solver.solve()
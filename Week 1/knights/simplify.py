@@ -0,0 +1,169 @@
+from logic import And, Biconditional, Implication, Not, Or, Symbol, shared
+
+# The empty And is true and the empty Or is false, they stand for constants
+TRUE = shared(And())
+FALSE = Or()
+
+
+def negate(sentence):
+    """Returns the simplified negation of a simplified sentence."""
+    if sentence is TRUE:
+        return FALSE
+    if sentence is FALSE:
+        return TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def literal(sentence):
+    """Returns the symbol of a literal and whether it is positive,
+    or (None, None) if sentence is not a literal."""
+    if isinstance(sentence, Symbol):
+        return sentence, True
+    if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+        return sentence.operand, False
+    return None, None
+
+
+def junction(cls, operands):
+    """Returns the simplified And or Or of simplified operands: nested ones
+    of the same kind flattened, duplicates and identities dropped, and a
+    dominating constant or complementary pair folded to a constant."""
+    identity, dominant = (TRUE, FALSE) if cls is And else (FALSE, TRUE)
+    kept = []
+    seen = set()
+    negated = set()
+    pending = list(reversed(operands))
+    while pending:
+        operand = pending.pop()
+        if operand is identity or operand in seen:
+            continue
+        if operand is dominant:
+            return dominant
+        if isinstance(operand, cls) and operand is not identity:
+            pending.extend(reversed(operand.conjuncts if cls is And else operand.disjuncts))
+            continue
+        if operand in negated or (isinstance(operand, Not) and operand.operand in seen):
+            return dominant
+        seen.add(operand)
+        if isinstance(operand, Not):
+            negated.add(operand.operand)
+        kept.append(operand)
+
+    if not kept:
+        return identity
+    if len(kept) == 1:
+        return kept[0]
+    return shared(cls(*kept))
+
+
+def simplify(sentence, values=None):
+    """Returns a simplified sentence equivalent to sentence, after replacing
+    the symbols named in values (name -> sentence) by their values."""
+    values = values or {}
+    done = {}
+
+    def visit(sentence):
+        if isinstance(sentence, Symbol):
+            return values.get(sentence.name, sentence)
+        if sentence in done:
+            return done[sentence]
+
+        if isinstance(sentence, Not):
+            result = negate(visit(sentence.operand))
+        elif isinstance(sentence, And):
+            result = junction(And, [visit(conjunct) for conjunct in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            result = junction(Or, [visit(disjunct) for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            result = junction(Or, [negate(visit(sentence.antecedent)), visit(sentence.consequent)])
+            if isinstance(result, Or) and len(result.disjuncts) == 2:
+                # nothing folded, keep it an implication
+                result = Implication(negate(result.disjuncts[0]), result.disjuncts[1])
+        elif isinstance(sentence, Biconditional):
+            left, right = visit(sentence.left), visit(sentence.right)
+            if left is right:
+                result = TRUE
+            elif left is negate(right):
+                result = FALSE
+            elif left is TRUE or left is FALSE:
+                result = right if left is TRUE else negate(right)
+            elif right is TRUE or right is FALSE:
+                result = left if right is TRUE else negate(left)
+            else:
+                result = Biconditional(left, right)
+        else:
+            raise TypeError(f"cannot simplify {type(sentence).__name__}")
+
+        done[sentence] = result
+        return result
+
+    return visit(sentence)
+
+
+def bindings(conjuncts):
+    """Finds the symbols top-level conjuncts fix to a constant or to
+    another literal: unit literals, biconditionals of two literals, and
+    pairs Or(a, b), Not(And(a, b)) of two literals (a is the negation of b).
+
+    Returns a dictionary of name -> value in which no value mentions a
+    symbol bound by the dictionary, so it can be applied in one pass.
+    """
+    found = {}
+    used = set()
+
+    def bind(literal_sentence, value):
+        symbol, positive = literal(literal_sentence)
+        other, _ = literal(value)
+        if symbol.name in found or symbol.name in used:
+            return
+        if other is not None and (other.name in found or other.name == symbol.name):
+            return
+        found[symbol.name] = value if positive else negate(value)
+        used.add(symbol.name)
+        if other is not None:
+            used.add(other.name)
+
+    disjunctions = set()
+    for conjunct in conjuncts:
+        if isinstance(conjunct, Or) and len(conjunct.disjuncts) == 2:
+            disjunctions.add(frozenset(conjunct.disjuncts))
+
+    for conjunct in conjuncts:
+        symbol, _ = literal(conjunct)
+        if symbol is not None:
+            bind(conjunct, TRUE)
+        elif isinstance(conjunct, Biconditional):
+            if literal(conjunct.left)[0] is not None and literal(conjunct.right)[0] is not None:
+                bind(conjunct.left, conjunct.right)
+        elif isinstance(conjunct, Not) and isinstance(conjunct.operand, And):
+            pair = conjunct.operand.conjuncts
+            if (len(pair) == 2 and frozenset(pair) in disjunctions
+                    and all(literal(operand)[0] is not None for operand in pair)):
+                bind(pair[0], negate(pair[1]))
+    return found
+
+
+def prepare(knowledge, query):
+    """Returns knowledge and query simplified, with every symbol the
+    knowledge base fixes (see bindings) substituted away in both.
+
+    The knowledge base entails the query exactly when the prepared one
+    entails the prepared query, and both mention fewer symbols.
+    """
+    knowledge = simplify(knowledge)
+    values = {}
+    while knowledge is not FALSE:
+        conjuncts = knowledge.conjuncts if isinstance(knowledge, And) else [knowledge]
+        found = bindings(conjuncts)
+        if not found:
+            break
+        values = {name: simplify(value, found) for name, value in values.items()}
+        values.update(found)
+        knowledge = simplify(knowledge, found)
+
+    # an inconsistent knowledge base entails anything
+    if knowledge is FALSE:
+        return FALSE, TRUE
+    return knowledge, simplify(query, values)
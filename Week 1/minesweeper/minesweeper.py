@@ -98,6 +98,10 @@ class Sentence():
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        # a sentence must not be changed while in a set, the AI replaces them instead
+        return hash((frozenset(self.cells), self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -153,26 +157,109 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Set of sentences about the game known to be true
+        self.knowledge = set()
+
+        # Sentences in the knowledge base that mention each cell
+        self.containing = {}
+
+        # Sentences added or changed since inferences were last drawn from them
+        self.pending = []
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+
+        # only sentences mentioning the cell change, each is replaced
+        for sentence in self.containing.pop(cell, ()):
+            self.remove_sentence(sentence)
+            self.add_sentence(Sentence(sentence.cells - {cell}, sentence.count - 1))
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+
+        for sentence in self.containing.pop(cell, ()):
+            self.remove_sentence(sentence)
+            self.add_sentence(Sentence(sentence.cells - {cell}, sentence.count))
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, leaving out cells already
+        known to be safe or mines, and queues it for inference.
+        Empty sentences and sentences already known are dropped.
+        """
+        mines = sentence.cells & self.mines
+        cells = sentence.cells - mines - self.safes
+        if not cells:
+            return
+        sentence = Sentence(cells, sentence.count - len(mines))
+        if sentence in self.knowledge:
+            return
+
+        self.knowledge.add(sentence)
+        for cell in cells:
+            self.containing.setdefault(cell, set()).add(sentence)
+        self.pending.append(sentence)
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base.
+        """
+        self.knowledge.discard(sentence)
+        for cell in sentence.cells:
+            sentences = self.containing.get(cell)
+            if sentences is not None:
+                sentences.discard(sentence)
+                if not sentences:
+                    del self.containing[cell]
+
+    def infer(self):
+        """
+        Draws every conclusion that follows from the pending sentences:
+        cells they determine are marked safe or mines, and sentences
+        overlapping one as a subset or superset give the difference of the two.
+        New and changed sentences are queued in turn until none are left.
+        """
+        while self.pending:
+            sentence = self.pending.pop()
+
+            # replaced or removed since it was queued
+            if sentence not in self.knowledge:
+                continue
+
+            known_safes = sentence.known_safes()
+            known_mines = sentence.known_mines()
+            if known_safes:
+                for cell in list(known_safes):
+                    self.mark_safe(cell)
+                continue
+            if known_mines:
+                for cell in list(known_mines):
+                    self.mark_mine(cell)
+                continue
+
+            # a subset or superset of sentence shares all of its cells with it, or all of their own
+            others = set()
+            for cell in sentence.cells:
+                others |= self.containing[cell]
+            others.discard(sentence)
+
+            for other in others:
+                if sentence.cells < other.cells:
+                    self.add_sentence(Sentence(other.cells - sentence.cells, other.count - sentence.count))
+                elif other.cells < sentence.cells:
+                    self.add_sentence(Sentence(sentence.cells - other.cells, sentence.count - other.count))
 
     def add_knowledge(self, cell, count):
         """
@@ -196,61 +283,18 @@ class MinesweeperAI():
         # 3
         x, y = cell
         cells = []
-        known_mine_count = 0
 
-        # loop over all neighbouring cells
+        # loop over all neighbouring cells in bounds, known ones are left out when adding
         for i in range(x - 1, x + 2):
             for j in range(y - 1, y + 2):
-                n_cell = (i, j)
-
-                # count neighbouring cells known to be mines, later to be subtracted from count
-                if n_cell in self.mines:
-                    known_mine_count += 1
-
-                # if cell in bounds and is undetermined, add to sentence's cells
-                if 0 <= i < self.height and 0 <= j < self.width and n_cell not in self.mines and n_cell not in self.safes:
-                    cells.append(n_cell)
-       
-        self.knowledge.append(Sentence(cells, count - known_mine_count))
-
-        # 4
-        new_safes = []
-        new_mines = []
-        
-        # find all cells determined to be safes or mines
-        for sentence in self.knowledge:
-            known_safes = sentence.known_safes()
-            known_mines = sentence.known_mines()
-
-            if known_safes:
-                new_safes.extend(known_safes)
-            
-            if known_mines:
-                new_mines.extend(known_mines)
-        
-        # add newly found safes and mines if there are any
-        for safe in new_safes:
-            self.mark_safe(safe)
-        
-        for mine in new_mines:
-            self.mark_mine(mine)
+                if 0 <= i < self.height and 0 <= j < self.width and (i, j) != cell:
+                    cells.append((i, j))
 
-        # 5
-        new_sentences = []
+        self.add_sentence(Sentence(cells, count))
 
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
+        # 4 and 5, only from sentences touched by this move
+        self.infer()
 
-                # if one is a subset of another, get the resulting set and count
-                if sentence1 != sentence2 and sentence1.cells.issubset(sentence2.cells):
-                    new_set, new_count = sentence2.cells - sentence1.cells, sentence2.count - sentence1.count
-                    new_sentences.append(Sentence(new_set, new_count))
-        
-        for sentence in new_sentences:
-            # add a newly created sentence if it is not the same as an existing one
-            if sentence not in self.knowledge:
-                self.knowledge.append(sentence)
-            
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.